@@ -14,13 +14,15 @@ Long description of module's purpose
     'version': '0.1',
 
     # any module necessary for this one to work correctly
-    'depends': ['base', 'industry_fsm'],
+    'depends': ['base', 'bus', 'industry_fsm', 'stock'],
 
     # always loaded
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'views/project_task.xml',
         'views/project_task_type.xml',
+        'views/res_users.xml',
     ],
     # only loaded in demonstration mode
     'demo': [
@@ -5,42 +5,59 @@ import logging
 from odoo import exceptions
 from odoo.http import request
 from odoo import _, http
+from .utils import rate_limit, request_log
 from .utils.api_response import ApiResponse
+from .utils.replica import readonly_unless_recent_write
 
 _logger = logging.getLogger(__name__)
+_logger.addFilter(request_log.RequestIdFilter())
 
 
-def token_required(f):
-    """Decorator to verify the access token"""
+def token_required(f=None, route_class=None):
+    """
+    Decorator to verify the access token of `auth='fsm_bearer'` routes,
+    then apply the rate limit and concurrency cap of the route class
+    (`read` for GET routes, `write` otherwise, unless given)
+    """
+    if f is None:
+        return functools.partial(token_required, route_class=route_class)
+
     @functools.wraps(f)
     def check_token_wrapper(*args, **kwargs):
-        token = request.httprequest.headers.get('Authorization')
+        token = request.env['ir.http']._get_fsm_bearer_token()
 
         if not token:
             return ApiResponse.error_response(_("Missing token"), None, 401)
 
-        try:
-            if token.startswith('Bearer '):
-                token = token.split(' ')[1]
-
-            user = request.env['res.users'].sudo().search(
-                [('access_token', '=', token)],
-                limit=1
+        # the token is resolved by the `fsm_bearer` auth method of the route
+        user = request.env.user
+        if user._is_public():
+            return ApiResponse.error_response(
+                _("Invalid token"), None, 401
             )
 
-            if not user or not user.check_token_validity(token):
-                return ApiResponse.error_response(
-                    _("Invalid token"), None, 401
-                )
+        limit_class = route_class or (
+            'read' if request.httprequest.method in ('GET', 'HEAD')
+            else 'write'
+        )
+        allowed, retry_after = rate_limit.consume(
+            limit_class, rate_limit.hash_key(token)
+        )
+        if not allowed:
+            return rate_limit.too_many_requests(retry_after)
 
-            request.env.user = user
-
-        except Exception as e:
-            _logger.error("Error token validation: %s", e)
-            return ApiResponse.error_response(_("Authentication failed"), None,
-                                              401)
+        with rate_limit.concurrency_slot(limit_class, user.id) as acquired:
+            if not acquired:
+                return rate_limit.too_many_requests(
+                    rate_limit.CONCURRENCY_RETRY_AFTER
+                )
+            response = f(*args, **kwargs)
 
-        return f(*args, **kwargs)
+        if limit_class != 'read' and response.status_code < 400:
+            # keep the reads of the user on the primary database until the
+            # replica has replayed this request
+            user._fsm_mark_api_write()
+        return response
 
     return check_token_wrapper
 
@@ -49,24 +66,23 @@ class AuthController(http.Controller):
     """Authentication controller"""
 
     @http.route(
-        '/api/auth/login', type='http', auth='public',
+        '/api/auth/login', type='http', auth='fsm_bearer',
         methods=['POST'], csrf=False, cors='*'
     )
     def api_login(self):
         """
         User authentication and token generation
         POST /api/auth/login
-        Body: {"email": "admin", "password": "admin"}
+        Body: {"email": "admin", "password": "admin", "totp": "123456"}
+        `totp` is only required for users with two-factor authentication.
         """
         try:
-            db = request.session.db
+            db = request.db
             if not db:
                 return ApiResponse.error_response(
                     _('Database not specified'), None, 400
                 )
-            data = json.loads(
-                request.httprequest.data.decode('utf-8')
-            )
+            data = request_log.parse_json_body()
             email = data.get('email')
             password = data.get('password')
             credentials = {
@@ -80,9 +96,34 @@ class AuthController(http.Controller):
                     _('Credentials required'), None, 400
                 )
 
+            # per address, with a higher limit as technicians may share one
+            # (proxy, carrier NAT), then per login and address: the
+            # password hashing is bounded for an address cycling the logins
+            remote_addr = request.httprequest.remote_addr
+            login_key = rate_limit.hash_key(
+                f'{str(email).lower()}:{remote_addr}'
+            )
+            for limit_class, key in (
+                ('auth_address', remote_addr),
+                ('auth', login_key),
+            ):
+                allowed, retry_after = rate_limit.consume(limit_class, key)
+                if not allowed:
+                    return rate_limit.too_many_requests(retry_after)
+
             try:
-                request.session.authenticate(db, credentials)
-                uid = request.session.uid
+                # no session: the app only uses the access token
+                auth_info = request.env['res.users'].authenticate(
+                    db, credentials, {
+                        'interactive': True,
+                        'base_location': request.httprequest.url_root.rstrip(
+                            '/'),
+                        'HTTP_HOST': request.httprequest.environ.get(
+                            'HTTP_HOST'),
+                        'REMOTE_ADDR': remote_addr,
+                    }
+                )
+                uid = auth_info['uid']
 
             except exceptions.AccessDenied:
                 return ApiResponse.error_response(
@@ -90,7 +131,25 @@ class AuthController(http.Controller):
                 )
 
             user = request.env['res.users'].sudo().browse(uid)
+            # the session login would stop here for a second factor
+            if auth_info.get('mfa') != 'skip' and user._mfa_url():
+                totp = data.get('totp')
+                if not totp:
+                    return ApiResponse.error_response(
+                        _('Two-factor authentication code required'),
+                        {'mfaRequired': True}, 401
+                    )
+                try:
+                    user._totp_check(int(str(totp).replace(' ', '')))
+                except (exceptions.AccessDenied, ValueError):
+                    return ApiResponse.error_response(
+                        _('Incorrect two-factor authentication code'),
+                        {'mfaRequired': True}, 401
+                    )
+
             token = user.generate_access_token()
+            refresh_token = request.env[
+                'fsm.api.refresh.token'].sudo()._issue(user)
 
             return ApiResponse.success_response(
                 _("Login successfully"),
@@ -98,7 +157,9 @@ class AuthController(http.Controller):
                     'userId': uid,
                     'email': user.email,
                     'name': user.name,
-                    'token': token
+                    'token': token,
+                    'refreshToken': refresh_token,
+                    'expiresIn': user._get_access_token_lifetime() * 60
                 }
             )
 
@@ -109,8 +170,67 @@ class AuthController(http.Controller):
             )
 
     @http.route(
-        '/api/auth/verify-token', type='http', auth='public',
-        methods=['GET'], csrf=False, cors='*'
+        '/api/auth/refresh', type='http', auth='fsm_bearer',
+        methods=['POST'], csrf=False, cors='*'
+    )
+    def api_refresh(self):
+        """
+        Exchange a refresh token for a new access token and refresh token,
+        without checking the password
+        POST /api/auth/refresh
+        Body: {"refreshToken": "<refresh token>"}
+        """
+        try:
+            data = request_log.parse_json_body()
+            refresh_token = data.get('refreshToken')
+            if not refresh_token or not isinstance(refresh_token, str):
+                return ApiResponse.error_response(
+                    _('Refresh token required'), None, 400
+                )
+
+            # per family, as each refresh returns a new token, and per
+            # address for the unknown tokens
+            token_model = request.env['fsm.api.refresh.token'].sudo()
+            family = token_model._get_family(refresh_token)
+            allowed, retry_after = rate_limit.consume(
+                'refresh',
+                f'family:{family}' if family
+                else f'address:{request.httprequest.remote_addr}'
+            )
+            if not allowed:
+                return rate_limit.too_many_requests(retry_after)
+
+            user, refresh_token = token_model._rotate(refresh_token)
+            if not user:
+                return ApiResponse.error_response(
+                    _('Invalid refresh token'), None, 401
+                )
+
+            token = user.generate_access_token()
+            return ApiResponse.success_response(
+                _("Token refreshed successfully"),
+                {
+                    'userId': user.id,
+                    'token': token,
+                    'refreshToken': refresh_token,
+                    'expiresIn': user._get_access_token_lifetime() * 60
+                }
+            )
+
+        except json.JSONDecodeError:
+            return ApiResponse.error_response(
+                _('Invalid JSON format'), None, 400
+            )
+        except Exception as e:
+            _logger.error("Error while refreshing the token: %s", e)
+            return ApiResponse.error_response(
+                _('Server error'), None, 500
+            )
+
+    @http.route(
+        '/api/auth/verify-token', type='http', auth='fsm_bearer',
+        methods=['GET'], csrf=False, cors='*',
+        readonly=readonly_unless_recent_write
     )
     @token_required
     def verify_token(self):
@@ -136,16 +256,14 @@ class AuthController(http.Controller):
             )
 
     @http.route(
-            '/api/auth/reset-password', type='http', auth='public',
+            '/api/auth/reset-password', type='http', auth='fsm_bearer',
             methods=['POST'], csrf=False
     )
     def reset_password(self):
         """
         Send an email to reset password
         """
-        data = json.loads(
-                request.httprequest.data.decode('utf-8')
-            )
+        data = request_log.parse_json_body()
         login = data.get("email")
         if not login:
             return ApiResponse.error_response(_("Email required"), None, 400)
@@ -166,7 +284,7 @@ class AuthController(http.Controller):
                 )
 
     @http.route(
-        '/api/auth/logout', type='http', auth='public',
+        '/api/auth/logout', type='http', auth='fsm_bearer',
         methods=['POST'], csrf=False, cors='*'
     )
     @token_required
@@ -179,6 +297,8 @@ class AuthController(http.Controller):
         try:
             user = request.env.user
             user.reset_token()
+            request.env['fsm.api.refresh.token'].sudo()._revoke_user_tokens(
+                user)
             return ApiResponse.success_response(
                 _("Log out successfully"), None
             )
@@ -1,18 +1,42 @@
 import base64
-from datetime import datetime
+from collections import defaultdict
+from functools import partial
+import hashlib
+from datetime import datetime, timedelta
 import json
 import logging
-from pytz import UTC
+from pytz import UTC, timezone
 import re
+import time
 
-from odoo import _, http
+from odoo import SUPERUSER_ID, _, api, http
+from odoo.addons.bus.models.bus import channel_with_db, json_dump
 from odoo.http import request
 from odoo.tools import html2plaintext
+from odoo.tools.lru import LRU
+from ..models.project_task import TASK_CHANGED_NOTIFICATION
+from ..models.sync_deferred_action import DEFERRED_SYNC_CONTEXT
 from .auth_controller import token_required
+from .utils import ndjson, request_log, sync_files, task_notifier
 from .utils.api_response import ApiResponse
 from .utils.parse_date import parse_date
+from .utils.replica import readonly_unless_recent_write
+from .utils.retry import CONCURRENCY_ERRORS, retry_on_concurrency_failure
 
 _logger = logging.getLogger(__name__)
+_logger.addFilter(request_log.RequestIdFilter())
+
+MAX_BATCH_SIZE = 200
+STREAM_BATCH_SIZE = 200
+MAX_MATERIALS_PAGE_SIZE = 500
+DEFAULT_MESSAGES_PAGE_SIZE = 50
+MAX_MESSAGES_PAGE_SIZE = 200
+
+# Materials pages cached per worker, keyed on the search and the stock
+# version. The TTL bounds the staleness of catalogue (name) changes.
+MATERIALS_CACHE = LRU(256)
+MATERIALS_CACHE_TTL = 300
+LONG_POLLING_TIMEOUT = 50
 
 
 class FSMController(http.Controller):
@@ -21,62 +45,45 @@ class FSMController(http.Controller):
     @http.route(
         '/api/interventions/list',
         type='http',
-        auth='public',
+        auth='fsm_bearer',
         methods=['GET'],
         csrf=False,
-        cors='*'
+        cors='*',
+        readonly=readonly_unless_recent_write
     )
     @token_required
-    def get_field_service_tasks(self):
+    def get_field_service_tasks(self, format=None, status=None, **filters):
         """
         Retrieve specific user's interventions
         GET /api/interventions/list?status=<status>&priority=<priority>
+            &period=<today|week>&dateFrom=<date>&dateTo=<date>
+            &maxDistance=<km>
         Headers: Authorization: Bearer <token>
+        With `format=ndjson` (or `Accept: application/x-ndjson`), the
+        interventions are streamed one per line, ordered by ID.
         """
         try:
-            current_user = request.env.user
-
-            domain = [
-                ('is_fsm', '=', True),
-                ('user_ids', 'in', current_user.id),
-                ('stage_id.stage_sequence', '!=', 3)
-            ]
+            user = request.env.user
+            if status and not status.isdigit():
+                return ApiResponse.error_response(
+                    _('status must be an integer'), None, 400
+                )
+            try:
+                domain = self._get_user_tasks_domain(
+                    user, int(status) if status else None
+                ) + self._get_list_filters_domain(user, **filters)
+            except ValueError as e:
+                return ApiResponse.error_response(str(e), None, 400)
+
+            if self._wants_ndjson(format):
+                return ndjson.ndjson_response(
+                    partial(self._generate_tasks_data, domain=domain)
+                )
 
             task_model = request.env['project.task'].sudo()
             tasks = task_model.search(domain, order='date_deadline ASC')
 
-            results = []
-            for task in tasks:
-                material_lines = self._get_material_lines(task)
-                required_materials = self._get_required_equipment(task)
-
-                results.append({
-                    'id': task.id,
-                    'title': task.name,
-                    'dateStart': task.planned_date_begin.astimezone(
-                        UTC).strftime('%d/%m/%Y')
-                    if task.planned_date_begin else None,
-                    'dateEnd': task.date_deadline.astimezone(
-                        UTC).strftime('%d/%m/%Y')
-                    if task.date_deadline else None,
-                    'status': task.stage_id.stage_sequence if task.stage_id
-                    else None,
-                    'priority': task.priority if task.priority else '',
-                    'description': html2plaintext(task.description or ''),
-                    'customer': task.partner_id.name if task.partner_id
-                    else '',
-                    'long': task.partner_id.partner_longitude,
-                    'lat': task.partner_id.partner_latitude,
-                    'telephone': task.partner_id.phone
-                    if task.partner_id.phone else '',
-                    'address': re.sub(
-                        r'\s+', ' ',
-                        task.partner_id.contact_address or ''
-                    ).strip(),
-                    'distance': task.distance if task.distance else 0,
-                    'materials': material_lines,
-                    'materialRequired': required_materials
-                })
+            results = self._prepare_tasks_data(tasks)
 
             return ApiResponse.success_response(
                 _("Interventions data retrieved successfully"),
@@ -88,14 +95,294 @@ class FSMController(http.Controller):
             return ApiResponse.error_response(_('Server error'),  None, 500)
 
     @http.route(
-        '/api/interventions/<int:task_id>',
+        '/api/interventions',
+        type='http',
+        auth='fsm_bearer',
+        methods=['GET'],
+        csrf=False,
+        cors='*',
+        readonly=readonly_unless_recent_write
+    )
+    @token_required
+    def get_field_service_tasks_by_ids(self, ids=None):
+        """
+        Retrieve several interventions in one call
+        GET /api/interventions?ids=<task_id>,<task_id>,...
+        Headers: Authorization: Bearer <token>
+        Unknown or foreign IDs are returned as {"id": .., "error": ..}
+        """
+        try:
+            try:
+                task_ids = [
+                    int(task_id) for task_id in (ids or '').split(',')
+                    if task_id.strip()
+                ]
+            except ValueError:
+                return ApiResponse.error_response(
+                    _('ids must be a comma separated list of integers'),
+                    None, 400
+                )
+
+            if not task_ids:
+                return ApiResponse.error_response(
+                    _('ids required'), None, 400
+                )
+            if len(task_ids) > MAX_BATCH_SIZE:
+                return ApiResponse.error_response(
+                    _('At most %s interventions per request', MAX_BATCH_SIZE),
+                    None, 400
+                )
+
+            current_user = request.env.user
+            tasks = request.env['project.task'].sudo().browse(
+                task_ids).exists()
+            allowed = tasks.filtered(
+                lambda task: current_user in task.user_ids
+            )
+            tasks_data = {
+                data['id']: data for data in self._prepare_tasks_data(allowed)
+            }
+
+            results = []
+            for task_id in task_ids:
+                if task_id in tasks_data:
+                    results.append(tasks_data[task_id])
+                elif task_id in tasks.ids:
+                    results.append({'id': task_id, 'error': 'forbidden'})
+                else:
+                    results.append({'id': task_id, 'error': 'notFound'})
+
+            return ApiResponse.success_response(
+                _("Interventions data retrieved successfully"), results
+            )
+
+        except Exception as e:
+            _logger.error("Error while retrieving tasks: %s", e)
+            return ApiResponse.error_response(_('Server error'), None, 500)
+
+    @http.route(
+        '/api/interventions/all',
         type='http',
-        auth='public',
+        auth='fsm_bearer',
         methods=['GET'],
         csrf=False,
         cors='*'
     )
     @token_required
+    def get_all_field_service_tasks(self):
+        """
+        Stream the open interventions of all technicians (supervisors only)
+        GET /api/interventions/all
+        Headers: Authorization: Bearer <token>
+        NDJSON, one intervention per line with its `userIds`, ordered by ID.
+        """
+        try:
+            if not self._is_supervisor(request.env.user):
+                return ApiResponse.error_response(
+                    _('Only field service managers can access this data'),
+                    None, 403
+                )
+
+            domain = [
+                ('is_fsm', '=', True),
+                ('stage_id.stage_sequence', '!=', 3)
+            ]
+            return ndjson.ndjson_response(
+                partial(
+                    self._generate_tasks_data,
+                    domain=domain,
+                    with_users=True
+                )
+            )
+
+        except Exception as e:
+            _logger.error("Error while retrieving task data: %s", e)
+            return ApiResponse.error_response(_('Server error'), None, 500)
+
+    @http.route(
+        '/api/supervisor/workload',
+        type='http',
+        auth='fsm_bearer',
+        methods=['GET'],
+        csrf=False,
+        cors='*',
+        readonly=readonly_unless_recent_write
+    )
+    @token_required
+    def get_workload(self):
+        """
+        Open and late interventions, planned and spent hours and distance
+        of each technician (supervisors only)
+        GET /api/supervisor/workload
+        Headers: Authorization: Bearer <token>
+        Served from a materialized view refreshed every few minutes and
+        shortly after the changes of the interventions.
+        """
+        try:
+            if not self._is_supervisor(request.env.user):
+                return ApiResponse.error_response(
+                    _('Only field service managers can access this data'),
+                    None, 403
+                )
+
+            summaries = request.env['fsm.workload.summary'].sudo().search([])
+            return ApiResponse.success_response(
+                _("Workload retrieved successfully"),
+                [
+                    {
+                        'userId': summary.user_id.id,
+                        'name': summary.user_id.name,
+                        'openCount': summary.open_count,
+                        'lateCount': summary.late_count,
+                        'plannedHours': summary.planned_hours,
+                        'spentHours': summary.spent_hours,
+                        'distance': round(summary.distance, 2),
+                        'refreshedAt': summary.refreshed_at.replace(
+                            tzinfo=UTC).isoformat(),
+                    }
+                    for summary in summaries
+                ]
+            )
+
+        except Exception as e:
+            _logger.error("Error while retrieving the workload: %s", e)
+            return ApiResponse.error_response(_('Server error'), None, 500)
+
+    @http.route(
+        '/api/interventions/changes',
+        type='http',
+        auth='fsm_bearer',
+        methods=['GET'],
+        csrf=False,
+        cors='*'
+    )
+    @token_required
+    def get_task_changes(self, last=None, timeout=None):
+        """
+        Wait for changes on the user's interventions (long polling)
+        GET /api/interventions/changes?last=<cursor>&timeout=<seconds>
+        Headers: Authorization: Bearer <token>
+        Answers as soon as one of the user's interventions is created,
+        reassigned, rescheduled or re-staged, or when the timeout expires.
+        Without `last`, only the current cursor is returned.
+        """
+        try:
+            try:
+                last = int(last) if last else None
+                timeout = min(
+                    float(timeout or LONG_POLLING_TIMEOUT),
+                    LONG_POLLING_TIMEOUT
+                )
+            except ValueError:
+                return ApiResponse.error_response(
+                    _('last and timeout must be numbers'), None, 400
+                )
+
+            registry = request.env.registry
+            channel = channel_with_db(request.db, request.env.user.partner_id)
+            message = _("Intervention changes retrieved successfully")
+            error_message = _('Server error')
+            if last is None:
+                cursor = self._get_task_changes(request.env, channel, None)[0]
+                return ApiResponse.success_response(
+                    message, {'last': cursor, 'taskIds': []}
+                )
+
+            def wait():
+                # runs while the response is sent, once the request cursor
+                # is released: a cursor is only borrowed to read the changes
+                # each time the channel is notified
+                cursor = last
+                try:
+                    with task_notifier.dispatcher.subscribe(channel) as event:
+                        deadline = time.monotonic() + timeout
+                        while True:
+                            event.clear()
+                            with registry.cursor() as cr:
+                                env = api.Environment(cr, SUPERUSER_ID, {})
+                                cursor, task_ids = self._get_task_changes(
+                                    env, channel, cursor
+                                )
+                            remaining = deadline - time.monotonic()
+                            if task_ids or remaining <= 0:
+                                break
+                            event.wait(remaining)
+                except Exception as e:
+                    _logger.error("Error while waiting for task changes: %s",
+                                  e)
+                    yield ApiResponse.error_body(error_message, None).encode()
+                    return
+                yield ApiResponse.success_body(
+                    message, {'last': cursor, 'taskIds': task_ids}
+                ).encode()
+
+            return request.make_response(
+                wait(), headers=[('Content-Type', 'application/json')]
+            )
+
+        except Exception as e:
+            _logger.error("Error while waiting for task changes: %s", e)
+            return ApiResponse.error_response(_('Server error'), None, 500)
+
+    @http.route(
+        '/api/interventions/offline-bundle',
+        type='http',
+        auth='fsm_bearer',
+        methods=['GET'],
+        csrf=False,
+        cors='*'
+    )
+    @token_required
+    def get_offline_bundle(self):
+        """
+        Download the user's working set for offline use
+        GET /api/interventions/offline-bundle
+        Headers: Authorization: Bearer <token>
+                 If-None-Match: <ETag of the previous bundle>
+        Gzip compressed NDJSON: a `bundle` header line, then the `stage`,
+        `intervention` and `product` lines.
+        """
+        try:
+            tasks = request.env['project.task'].sudo().search(
+                self._get_user_tasks_domain(request.env.user),
+                order='date_deadline ASC'
+            )
+            version = self._get_offline_bundle_version(tasks)
+
+            if version in request.httprequest.if_none_match:
+                return request.make_response(
+                    '', status=304, headers=[('ETag', f'"{version}"')]
+                )
+
+            return ndjson.ndjson_response(
+                partial(
+                    self._generate_offline_bundle,
+                    task_ids=tasks.ids,
+                    version=version
+                ),
+                compress=True,
+                headers=[
+                    ('ETag', f'"{version}"'),
+                    ('Cache-Control', 'private, no-cache'),
+                    ('Content-Disposition',
+                     'attachment; filename="offline-bundle.ndjson.gz"'),
+                ]
+            )
+
+        except Exception as e:
+            _logger.error("Error while building the offline bundle: %s", e)
+            return ApiResponse.error_response(_('Server error'), None, 500)
+
+    @http.route(
+        '/api/interventions/<int:task_id>',
+        type='http',
+        auth='fsm_bearer',
+        methods=['GET'],
+        csrf=False,
+        cors='*',
+        readonly=readonly_unless_recent_write
+    )
+    @token_required
     def get_field_service_task(self, task_id):
         """
         Retrieve specific intervention by ID
@@ -119,35 +406,7 @@ class FSMController(http.Controller):
                     _('You can only view your own task'), None, 403
                 )
 
-            material_lines = self._get_material_lines(task)
-            required_materials = self._get_required_equipment(task)
-
-            task_data = {
-                'id': task.id,
-                'title': task.name,
-                'dateStart': task.planned_date_begin.astimezone(
-                    UTC).strftime('%d/%m/%Y')
-                if task.planned_date_begin else None,
-                'dateEnd': task.date_deadline.astimezone(
-                    UTC).strftime('%d/%m/%Y')
-                if task.date_deadline else None,
-                'status': task.stage_id.stage_sequence if task.stage_id
-                else None,
-                'priority': task.priority if task.priority else '',
-                'description': html2plaintext(task.description or ''),
-                'customer': task.partner_id.name if task.partner_id else '',
-                'long': task.partner_id.partner_longitude,
-                'lat': task.partner_id.partner_latitude,
-                'telephone': task.partner_id.phone
-                if task.partner_id.phone else '',
-                'address': re.sub(
-                    r'\s+', ' ',
-                    task.partner_id.contact_address or ''
-                ).strip(),
-                'distance': task.distance if task.distance else 0,
-                'materials': material_lines,
-                'materialRequired': required_materials
-            }
+            task_data = self._prepare_tasks_data(task)[0]
 
             return ApiResponse.success_response(
                 _("Task retrieved successfully"), task_data
@@ -157,15 +416,200 @@ class FSMController(http.Controller):
             _logger.error(_("Error retrieving task: %s", e))
             return ApiResponse.error_response(_('Server error'),  None, 500)
 
+    @http.route(
+        '/api/interventions/<int:task_id>/attachments',
+        type='http',
+        auth='fsm_bearer',
+        methods=['GET'],
+        csrf=False,
+        cors='*'
+    )
+    @token_required
+    def get_task_attachments(self, task_id):
+        """
+        List the attachments of an intervention (metadata only)
+        GET /api/interventions/<task_id>/attachments
+        Headers: Authorization: Bearer <token>
+        """
+        try:
+            task = request.env['project.task'].sudo().browse(task_id)
+            if not task.exists():
+                return ApiResponse.error_response(
+                    _('Intervention not found'), None, 404
+                )
+            if request.env.user not in task.user_ids:
+                return ApiResponse.error_response(
+                    _('You can only view your own task'), None, 403
+                )
+
+            attachments = request.env['ir.attachment'].sudo().search([
+                ('res_model', '=', 'project.task'),
+                ('res_id', '=', task.id)
+            ], order='id ASC')
+
+            results = [
+                {
+                    'id': attachment.id,
+                    'name': attachment.name,
+                    'mimetype': attachment.mimetype,
+                    'size': attachment.file_size,
+                    'checksum': attachment.checksum,
+                    'createDate': attachment.create_date.replace(
+                        tzinfo=UTC).isoformat(),
+                    'hasThumbnail': bool(attachment.fsm_thumbnail_id)
+                } for attachment in attachments
+            ]
+
+            return ApiResponse.success_response(
+                _("Attachments retrieved successfully"), results
+            )
+
+        except Exception as e:
+            _logger.error("Error retrieving attachments: %s", e)
+            return ApiResponse.error_response(_('Server error'), None, 500)
+
+    @http.route(
+        '/api/interventions/<int:task_id>/messages',
+        type='http',
+        auth='fsm_bearer',
+        methods=['GET'],
+        csrf=False,
+        cors='*',
+        readonly=readonly_unless_recent_write
+    )
+    @token_required
+    def get_task_messages(self, task_id, before=None, since=None,
+                          limit=None):
+        """
+        Message history of an intervention, newest first
+        GET /api/interventions/<task_id>/messages?before=<cursor>
+            &since=<message id>&limit=<page size>
+        Headers: Authorization: Bearer <token>
+        Pages are ordered by (date, id): the `X-Next-Cursor` response
+        header holds the `before` value of the next (older) page. `since`
+        only returns the messages posted after the given message.
+        """
+        try:
+            try:
+                before = int(before or 0)
+                since = int(since or 0)
+                limit = int(limit or DEFAULT_MESSAGES_PAGE_SIZE)
+            except ValueError:
+                return ApiResponse.error_response(
+                    _('before, since and limit must be integers'), None, 400
+                )
+            if limit < 1 or limit > MAX_MESSAGES_PAGE_SIZE:
+                return ApiResponse.error_response(
+                    _('limit must be between 1 and %s',
+                      MAX_MESSAGES_PAGE_SIZE),
+                    None, 400
+                )
+
+            task = request.env['project.task'].sudo().browse(task_id)
+            if not task.exists():
+                return ApiResponse.error_response(
+                    _('Intervention not found'), None, 404
+                )
+            if request.env.user not in task.user_ids:
+                return ApiResponse.error_response(
+                    _('You can only view your own task'), None, 403
+                )
+
+            cursor = request.env['mail.message'].sudo().browse(
+                before).exists() if before else None
+            if before and (
+                not cursor or cursor.model != 'project.task'
+                or cursor.res_id != task.id
+            ):
+                return ApiResponse.error_response(
+                    _('Invalid cursor'), None, 400
+                )
+
+            messages, next_cursor = self._search_task_messages(
+                task, cursor, since, limit
+            )
+            return ApiResponse.success_response(
+                _("Messages retrieved successfully"),
+                self._prepare_messages_data(messages),
+                headers=[('X-Next-Cursor', str(next_cursor))]
+                if next_cursor else None
+            )
+
+        except Exception as e:
+            _logger.error("Error retrieving messages: %s", e)
+            return ApiResponse.error_response(_('Server error'), None, 500)
+
+    @http.route(
+        '/api/interventions/<int:task_id>/attachments/<int:attachment_id>',
+        type='http',
+        auth='fsm_bearer',
+        methods=['GET', 'HEAD'],
+        csrf=False,
+        cors='*'
+    )
+    @token_required
+    def download_task_attachment(self, task_id, attachment_id,
+                                 variant='original'):
+        """
+        Download an attachment of an intervention
+        GET /api/interventions/<task_id>/attachments/<attachment_id>
+            ?variant=original|thumbnail
+        Headers: Authorization: Bearer <token>
+        The file is streamed from the filestore and supports Range and
+        conditional (If-None-Match) requests.
+        """
+        try:
+            if variant not in ('original', 'thumbnail'):
+                return ApiResponse.error_response(
+                    _('variant must be original or thumbnail'), None, 400
+                )
+
+            task = request.env['project.task'].sudo().browse(task_id)
+            if not task.exists():
+                return ApiResponse.error_response(
+                    _('Intervention not found'), None, 404
+                )
+            if request.env.user not in task.user_ids:
+                return ApiResponse.error_response(
+                    _('You can only view your own task'), None, 403
+                )
+
+            attachment = request.env['ir.attachment'].sudo().browse(
+                attachment_id).exists()
+            if (
+                not attachment or
+                attachment.res_model != 'project.task' or
+                attachment.res_id != task.id
+            ):
+                return ApiResponse.error_response(
+                    _('Attachment not found'), None, 404
+                )
+            if variant == 'thumbnail' and attachment.fsm_thumbnail_id:
+                attachment = attachment.fsm_thumbnail_id
+
+            stream = request.env['ir.binary']._get_stream_from(attachment)
+            response = stream.get_response(as_attachment=True)
+            # the content of an attachment may still change (e.g. image
+            # processing), clients revalidate with the checksum ETag
+            response.cache_control.public = None
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+        except Exception as e:
+            _logger.error("Error downloading attachment: %s", e)
+            return ApiResponse.error_response(_('Server error'), None, 500)
+
     @http.route(
         '/api/interventions/update-status',
         type='http',
-        auth='public',
+        auth='fsm_bearer',
         methods=['PUT'],
         csrf=False,
         cors='*'
     )
     @token_required
+    @retry_on_concurrency_failure
     def update_task_status(self):
         """
         Update task status
@@ -177,7 +621,7 @@ class FSMController(http.Controller):
         }
         """
         try:
-            data = json.loads(request.httprequest.data.decode('utf-8'))
+            data = request_log.parse_json_body()
             stage_sequence = data.get('statusId')
             intervention_id = data.get('interventionId')
 
@@ -221,19 +665,129 @@ class FSMController(http.Controller):
             return ApiResponse.error_response(
                 _('Invalid JSON format'), None, 400
             )
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
             _logger.error("Error updating status: %s", e)
             return ApiResponse.error_response(_('Server error'),  None, 500)
 
+    @http.route(
+        '/api/interventions/update-status/bulk',
+        type='http',
+        auth='fsm_bearer',
+        methods=['PUT'],
+        csrf=False,
+        cors='*'
+    )
+    @token_required
+    @retry_on_concurrency_failure
+    def update_tasks_status(self):
+        """
+        Update the status of several tasks in a single transaction
+        PUT /api/interventions/update-status/bulk
+        Headers: Authorization: Bearer <token>
+        Body: {
+            updates: [{statusId: <stage_id>, interventionId: <task_id>}]
+        }
+        """
+        try:
+            data = request_log.parse_json_body()
+            updates = data.get('updates') if isinstance(data, dict) else None
+
+            if not updates:
+                return ApiResponse.error_response(
+                    _('No updates provided'), None, 400
+                )
+            if not isinstance(updates, list) or not all(
+                isinstance(update, dict) for update in updates
+            ):
+                return ApiResponse.error_response(
+                    _('updates must be a list of objects'), None, 400
+                )
+            if len(updates) > MAX_BATCH_SIZE:
+                return ApiResponse.error_response(
+                    _('At most %s interventions per request', MAX_BATCH_SIZE),
+                    None, 400
+                )
+
+            def get_int(update, key):
+                value = update.get(key)
+                if isinstance(value, int) and not isinstance(value, bool):
+                    return value
+                return None
+
+            task_model = request.env['project.task'].sudo()
+            tasks = task_model.browse({
+                get_int(update, 'interventionId') for update in updates
+            } - {None}).exists()
+            task_by_id = {task.id: task for task in tasks}
+            stages = request.env['project.task.type'].sudo().search([
+                ('stage_sequence', 'in', list({
+                    get_int(update, 'statusId') for update in updates
+                } - {None}))
+            ])
+            stage_by_sequence = {
+                stage.stage_sequence: stage for stage in stages
+            }
+
+            task_ids_by_stage = defaultdict(list)
+            errors = []
+            for update in updates:
+                # echo the given ID, whatever its type
+                task_id = update.get('interventionId')
+                task = task_by_id.get(get_int(update, 'interventionId'))
+                stage = stage_by_sequence.get(get_int(update, 'statusId'))
+
+                if not task or not task.is_fsm:
+                    errors.append({'id': task_id, 'error': 'notFound'})
+                elif request.env.user not in task.user_ids:
+                    errors.append({'id': task_id, 'error': 'forbidden'})
+                elif not stage or task.project_id not in stage.project_ids:
+                    errors.append({'id': task_id, 'error': 'invalidStage'})
+                else:
+                    task_ids_by_stage[stage.id].append(task.id)
+
+            self._lock_sync_rows(
+                task_model.browse(sorted(
+                    task_id for task_ids in task_ids_by_stage.values()
+                    for task_id in task_ids
+                )),
+                with_order_lines=False
+            )
+            updated_ids = []
+            for stage_id, task_ids in task_ids_by_stage.items():
+                task_model.browse(task_ids).write({'stage_id': stage_id})
+                updated_ids.extend(task_ids)
+
+            return ApiResponse.success_response(
+                _('Status updated successfully'),
+                {
+                    'updated': updated_ids,
+                    'errors': errors
+                }
+            )
+
+        except json.JSONDecodeError:
+            return ApiResponse.error_response(
+                _('Invalid JSON format'), None, 400
+            )
+        except CONCURRENCY_ERRORS:
+            raise
+        except Exception as e:
+            request.env.cr.rollback()
+            _logger.error("Error updating statuses: %s", e)
+            return ApiResponse.error_response(_('Server error'), None, 500)
+
     @http.route(
         '/api/interventions/<int:task_id>/create-timesheet',
         type='http',
-        auth='public',
+        auth='fsm_bearer',
         methods=['POST'],
         csrf=False,
         cors='*'
     )
     @token_required
+    @retry_on_concurrency_failure
     def create_timesheet(self, task_id):
         """
         Create a timesheet entry
@@ -247,7 +801,7 @@ class FSMController(http.Controller):
         """
         response = None
         try:
-            data = json.loads(request.httprequest.data.decode('utf-8'))
+            data = request_log.parse_json_body()
 
             task = request.env['project.task'].sudo().browse(task_id)
 
@@ -300,6 +854,8 @@ class FSMController(http.Controller):
             response = ApiResponse.error_response(
                 _('Invalid JSON format'), None, 400
             )
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
             _logger.error("Error while creating timesheet: %s", e)
             response = ApiResponse.error_response(_('Server error'), None, 500)
@@ -309,26 +865,35 @@ class FSMController(http.Controller):
     @http.route(
         '/api/interventions/sync',
         type='http',
-        auth='public',
+        auth='fsm_bearer',
         methods=['POST'],
         csrf=False,
         cors='*'
     )
-    @token_required
+    @token_required(route_class='sync')
+    @retry_on_concurrency_failure
     def sync_intervention_data(self):
         """
         Synchronize offline intervention data
         - Create timesheet
         - Update task status
         - Upload files
+        With the `field_service_api.deferred_sync` system parameter, the
+        writes are done without mail tracking and notifications, which are
+        replayed afterwards by a cron with the FSM validation.
         """
         try:
-            data = json.loads(request.httprequest.data.decode('utf-8'))
+            data = request_log.parse_json_body()
             tasks_data = data.get('data', [])
             if not tasks_data:
                 return ApiResponse.error_response(_("No tasks provided"), None,
                                                   400)
 
+            deferred = self._is_deferred_sync()
+            if deferred:
+                request.update_context(**DEFERRED_SYNC_CONTEXT)
+
+            tasks = request.env['project.task'].sudo()
             for task_data in tasks_data:
                 task_id = task_data.get('id')
 
@@ -341,22 +906,36 @@ class FSMController(http.Controller):
                     return ApiResponse.error_response(
                           _("You can only sync your own tasks"), None, 403)
 
+                tasks |= task
+
+            self._lock_sync_rows(tasks)
+
+            for task_data in tasks_data:
+                task = tasks.browse(task_data.get('id'))
+
                 status = task_data.get('status')
                 timesheets = task_data.get('timesheets', [])
 
-                self._update_task_data(task, status, timesheets)
+                self._update_task_data(task, status, timesheets, deferred)
+
+                # one task at a time, the decoded files of the whole
+                # payload would double its memory
+                with request_log.timed('parsing'):
+                    prepared_files = sync_files.prepare_files(
+                        sync_files.get_payload_files(task_data)
+                    )
 
                 all_files = []
                 all_files.extend(task_data.get('images', []))
                 all_files.extend(task_data.get('documents', []))
-                self._upload_files(task, all_files)
+                self._upload_files(task, all_files, prepared_files)
 
                 comments = task_data.get('comments', [])
-                self._post_comments(task, comments)
+                self._post_comments(task, comments, prepared_files)
 
                 signature = task_data.get('signature')
                 if signature:
-                    self._upload_signature(task, signature)
+                    self._upload_signature(task, signature, prepared_files)
 
                 products = task_data.get('materials', [])
                 self._sync_products(task, products)
@@ -375,49 +954,260 @@ class FSMController(http.Controller):
             return ApiResponse.error_response(
                 _('Invalid JSON format'), None, 400
             )
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
+            request.env.cr.rollback()
             _logger.error("Error in sync: %s", e)
             return ApiResponse.error_response(_('Server error'), str(e), 500)
 
     @http.route(
             '/api/interventions/materials',
             type='http',
-            auth='public',
+            auth='fsm_bearer',
             methods=['GET'],
-            csrf=False
+            csrf=False,
+            readonly=readonly_unless_recent_write
     )
     @token_required
-    def get_materials(self):
+    def get_materials(self, q=None, after=None, limit=None,
+                      quantities='1'):
         """
-        Retrieve all products that can be used as materials
-        GET /api/interventions/materials
+        Retrieve the products that can be used as materials
+        GET /api/interventions/materials?q=<search>&after=<cursor>
+            &limit=<page size>&quantities=<0|1>
         Headers: Authorization
+        `q` searches the name and internal reference. With `limit`, the
+        `X-Next-Cursor` response header holds the `after` value of the next
+        page. `quantities=0` skips the computation of available quantities.
+        `quantityInVan` is the quantity in the user's van location.
         """
         try:
-            product_model = request.env['product.product'].sudo()
-            products = product_model.search([
-                ('type', 'in', ['consu', 'combo'])
-            ], order='id ASC')
+            try:
+                after = int(after or 0)
+                # without limit, the whole catalogue is returned
+                limit = int(limit) if limit else None
+            except ValueError:
+                return ApiResponse.error_response(
+                    _('after and limit must be integers'), None, 400
+                )
+            if limit is not None and not 1 <= limit <= MAX_MATERIALS_PAGE_SIZE:
+                return ApiResponse.error_response(
+                    _('limit must be between 1 and %s',
+                      MAX_MATERIALS_PAGE_SIZE),
+                    None, 400
+                )
+            limit = limit or 0
+            with_quantities = quantities not in ('0', 'false')
+
+            key = (
+                request.db,
+                tuple(request.env.companies.ids),
+                request.env.lang,
+                q or '',
+                after,
+                limit,
+                self._get_stock_version() if with_quantities else None,
+            )
+            cached = MATERIALS_CACHE.get(key)
+            if cached and cached[0] > time.monotonic():
+                results, next_cursor = cached[1]
+            else:
+                results, next_cursor = self._search_materials(
+                    q, after, limit, with_quantities
+                )
+                MATERIALS_CACHE[key] = (
+                    time.monotonic() + MATERIALS_CACHE_TTL,
+                    (results, next_cursor)
+                )
 
-            results = []
-            for product in products:
-                results.append({
-                    'id': product.id,
-                    'name': product.name,
-                    'quantityAvailable': product.qty_available
-                })
+            van_quantities = request.env.user._get_fsm_van_quantities(
+                [product['id'] for product in results]
+            )
+            results = [
+                dict(product, quantityInVan=van_quantities.get(
+                    product['id'], 0.0
+                ) if van_quantities is not None else None)
+                for product in results
+            ]
 
             return ApiResponse.success_response(
-                _("Materials retrieved successfully"), results
+                _("Materials retrieved successfully"),
+                results,
+                headers=[('X-Next-Cursor', str(next_cursor))]
+                if next_cursor else None
             )
 
         except Exception as e:
             _logger.error(_("Error retrieving materials: %s"), e)
             return ApiResponse.error_response(_('Server error'), None, 500)
 
-    def _update_task_data(self, task, status=None, timesheets=None):
+    def _search_materials(self, search=None, after=0, limit=0,
+                          with_quantities=True):
+        """
+        Return a page of materials, ordered by ID, and the cursor of the
+        next page (None on the last page). Quantities are computed for the
+        page only.
+        """
+        domain = [
+            ('type', 'in', ['consu', 'combo']),
+            ('id', '>', after)
+        ]
+        if search:
+            domain += [
+                '|',
+                ('name', 'ilike', search),
+                ('default_code', 'ilike', search)
+            ]
+
+        products = request.env['product.product'].sudo().search(
+            domain, order='id ASC', limit=limit + 1 if limit else None
+        )
+        next_cursor = None
+        if limit and len(products) > limit:
+            products = products[:limit]
+            next_cursor = products[-1].id
+
+        fields = ['name', 'qty_available'] if with_quantities else ['name']
+        results = [
+            {
+                'id': product['id'],
+                'name': product['name'],
+                'quantityAvailable': product.get('qty_available'),
+            } for product in products.read(fields)
+        ]
+        return results, next_cursor
+
+    def _search_task_messages(self, task, cursor=None, since=0, limit=0):
+        """
+        Return a page of messages of the task, ordered by date then ID
+        descending, older than the `cursor` message, and the cursor of the
+        next page (None on the last page). Messages synchronized from the
+        app keep their (older) creation date, hence `since` compares IDs.
+        """
+        message_model = request.env['mail.message'].sudo()
+        domain = [
+            ('model', '=', 'project.task'),
+            ('res_id', '=', task.id),
+            ('message_type', '!=', 'user_notification'),
+        ]
+        if since:
+            domain.append(('id', '>', since))
+        if cursor:
+            domain += [
+                '|',
+                ('date', '<', cursor.date),
+                '&', ('date', '=', cursor.date), ('id', '<', cursor.id),
+            ]
+
+        messages = message_model.search_fetch(
+            domain,
+            ['date', 'body', 'message_type', 'author_id', 'subtype_id',
+             'attachment_ids'],
+            order='date DESC, id DESC',
+            limit=limit + 1
+        )
+        next_cursor = None
+        if len(messages) > limit:
+            messages = messages[:limit]
+            next_cursor = messages[-1].id
+        return messages, next_cursor
+
+    def _prepare_messages_data(self, messages):
+        """
+        Serialize the messages, their authors, subtypes and attachments
+        being read in one query each for the whole page
+        """
+        messages.author_id.fetch(['name'])
+        messages.subtype_id.fetch(['name'])
+        messages.attachment_ids.fetch(
+            ['name', 'mimetype', 'file_size', 'fsm_thumbnail_id']
+        )
+        return [
+            {
+                'id': message.id,
+                'date': message.date.replace(tzinfo=UTC).isoformat(),
+                'type': message.message_type,
+                'subtype': message.subtype_id.name or None,
+                'author': {
+                    'id': message.author_id.id,
+                    'name': message.author_id.name,
+                } if message.author_id else None,
+                'body': html2plaintext(message.body or ''),
+                'attachments': [
+                    {
+                        'id': attachment.id,
+                        'name': attachment.name,
+                        'mimetype': attachment.mimetype,
+                        'size': attachment.file_size,
+                        'hasThumbnail': bool(attachment.fsm_thumbnail_id)
+                    } for attachment in message.attachment_ids
+                ],
+            } for message in messages
+        ]
+
+    def _get_stock_version(self):
+        """
+        Last update of the stock quants, which changes on every stock move
+        (indexed, see stock.quant)
+        """
+        request.env.cr.execute("SELECT MAX(write_date) FROM stock_quant")
+        return request.env.cr.fetchone()[0]
+
+    def _lock_sync_rows(self, tasks, with_order_lines=True):
+        """
+        Lock the tasks, then their sale order lines (and the other lines of
+        their sale orders), each by ascending ID. Concurrent syncs sharing
+        rows then wait for each other in the same order instead of
+        deadlocking, and conflicts with writes done since the transaction
+        started fail here, before any write.
+        """
+        cr = request.env.cr
+        cr.execute("""
+            SELECT id FROM project_task
+            WHERE id = ANY(%s)
+            ORDER BY id
+            FOR NO KEY UPDATE
+        """, [tasks.ids])
+        if not with_order_lines:
+            return
+        cr.execute("""
+            SELECT id FROM sale_order_line
+            WHERE task_id = ANY(%s) OR order_id = ANY(%s)
+            ORDER BY id
+            FOR NO KEY UPDATE
+        """, [tasks.ids, tasks.sale_order_id.ids])
+
+    def _get_task_changes(self, env, channel, last):
+        """
+        Return the last bus notification ID and the IDs of the tasks
+        notified on the channel after `last`. Without `last`, only the
+        current bus cursor is returned.
+        """
+        bus = env['bus.bus'].sudo()
+        if last is None:
+            return bus.search([], order='id DESC', limit=1).id or 0, None
+
+        notifications = bus.search_read(
+            [('channel', '=', json_dump(channel)), ('id', '>', last)],
+            ['message'],
+            order='id ASC'
+        )
+        task_ids = set()
+        for notification in notifications:
+            message = json.loads(notification['message'])
+            if message['type'] == TASK_CHANGED_NOTIFICATION:
+                task_ids.update(message['payload']['taskIds'])
+            last = notification['id']
+
+        return last, sorted(task_ids)
+
+    def _update_task_data(self, task, status=None, timesheets=None,
+                          deferred=False):
         """
         Updates status and adds timesheets
+        When `deferred`, the stage tracking and the FSM validation are
+        queued instead of being done on the request path
         """
         updates = {}
 
@@ -451,37 +1241,70 @@ class FSMController(http.Controller):
             updates['timesheet_ids'] = [(4, tid) for tid in new_timesheet_ids]
 
         if updates:
+            if stage and deferred:
+                request.env['fsm.sync.deferred.action'].sudo()\
+                    ._defer_stage_change(task, validate=True)
             task.sudo().write(updates)
-            if stage:
+            if stage and not deferred:
                 task.sudo().action_fsm_validate()
 
-    def _upload_files(self, task, attachment_files):
+    def _upload_files(self, task, attachment_files, prepared_files):
         """
-        Saves base64 encoded files as task-related attachments
+        Saves the files decoded by `sync_files.prepare_files` as
+        task-related attachments. A file already synchronized on the task
+        (same content) is not created again.
         """
+        attachment_model = request.env['ir.attachment'].sudo()
+        checksums = [
+            prepared.checksum for prepared in (
+                prepared_files.get(sync_files.file_key(file))
+                for file in attachment_files
+            ) if prepared
+        ]
+        existing = {
+            attachment.fsm_upload_checksum: attachment.id
+            for attachment in attachment_model.search([
+                ('res_model', '=', 'project.task'),
+                ('res_id', '=', task.id),
+                ('fsm_upload_checksum', 'in', checksums)
+            ])
+        } if checksums else {}
+
         attachment_ids = []
+        new_attachments = attachment_model
         for file in attachment_files:
             try:
                 filename = file.get('filename')
-                encoded_data = file.get('data')
-                if not filename or not encoded_data:
+                if not filename or not file.get('data'):
                     continue
 
-                decoded = base64.b64decode(encoded_data)
+                # undecodable files are logged by `prepare_files`
+                prepared = prepared_files.get(sync_files.file_key(file))
+                if not prepared:
+                    continue
 
-                attachment = request.env['ir.attachment'].sudo().create({
-                    'name': filename,
-                    'datas': base64.b64encode(decoded),
-                    'res_model': 'project.task',
-                    'res_id': task.id,
-                    'type': 'binary'
-                })
-                attachment_ids.append(attachment.id)
+                if prepared.checksum not in existing:
+                    attachment = attachment_model.create({
+                        'name': filename,
+                        'raw': prepared.raw,
+                        'mimetype': prepared.mimetype,
+                        'fsm_upload_checksum': prepared.checksum,
+                        'res_model': 'project.task',
+                        'res_id': task.id,
+                        'type': 'binary'
+                    })
+                    existing[prepared.checksum] = attachment.id
+                    new_attachments |= attachment
+                attachment_ids.append(existing[prepared.checksum])
+            except CONCURRENCY_ERRORS:
+                raise
             except Exception as e:
                 _logger.warning(_("File ignored : %s", e))
+
+        new_attachments._fsm_schedule_image_processing()
         return attachment_ids
 
-    def _post_comments(self, task, comments):
+    def _post_comments(self, task, comments, prepared_files):
         """
         Posts comments to the task
         """
@@ -499,7 +1322,8 @@ class FSMController(http.Controller):
                 if not message_body:
                     continue
 
-                attachment_ids = self._upload_files(task, attachment_files)
+                attachment_ids = self._upload_files(
+                    task, attachment_files, prepared_files)
 
                 note_subtype = request.env.ref('mail.mt_note')
 
@@ -515,10 +1339,12 @@ class FSMController(http.Controller):
                     attachment_ids else False,
                 })
 
+            except CONCURRENCY_ERRORS:
+                raise
             except Exception as e:
                 _logger.warning(_("Manual comment creation failed: %s", e))
 
-    def _upload_signature(self, task, signature):
+    def _upload_signature(self, task, signature, prepared_files):
         """
         Upload and save customer signature
         """
@@ -529,30 +1355,247 @@ class FSMController(http.Controller):
             if not filename or not encoded_data:
                 return
 
-            decoded = base64.b64decode(encoded_data)
+            prepared = prepared_files.get(sync_files.file_key(signature))
+            if not prepared:
+                _logger.warning(_("Failed to save signature: %s", filename))
+                return
 
             task.write({
-                'worksheet_signature': base64.b64encode(decoded)
+                'worksheet_signature': base64.b64encode(prepared.raw)
             })
+            request.env['ir.attachment'].sudo().search([
+                ('res_model', '=', 'project.task'),
+                ('res_id', '=', task.id),
+                ('res_field', '=', 'worksheet_signature')
+            ])._fsm_schedule_image_processing()
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
             _logger.warning(_("Failed to save signature: %s", e))
 
-    def _get_material_lines(self, task):
+    def _get_user_tasks_domain(self, user, status=None):
+        """
+        Domain of the open interventions assigned to the user, or of those
+        in the given status
+        """
+        return [
+            ('is_fsm', '=', True),
+            ('user_ids', 'in', user.id),
+            ('stage_id.stage_sequence', '=', status) if status
+            else ('stage_id.stage_sequence', '!=', 3)
+        ]
+
+    def _get_list_filters_domain(self, user, priority=None, period=None,
+                                 dateFrom=None, dateTo=None,
+                                 maxDistance=None, **kwargs):
+        """
+        Domain of the optional filters of the interventions list. The date
+        window (`period` or `dateFrom`/`dateTo`, both included) applies to
+        the planned start, in the timezone of the user.
+        Raises a ValueError on invalid filters.
+        """
+        domain = []
+        if priority:
+            priorities = request.env['project.task']._fields[
+                'priority'].get_values(request.env)
+            if priority not in priorities:
+                raise ValueError(_('priority must be one of %s',
+                                   ', '.join(priorities)))
+            domain.append(('priority', '=', priority))
+
+        tz = timezone(user.tz or 'UTC')
+        today = datetime.now(tz).date()
+        if period == 'today':
+            date_from = date_to = today
+        elif period == 'week':
+            date_from = today - timedelta(days=today.weekday())
+            date_to = date_from + timedelta(days=6)
+        elif period:
+            raise ValueError(_('period must be today or week'))
+        else:
+            try:
+                date_from = dateFrom and datetime.strptime(
+                    dateFrom, '%Y-%m-%d').date()
+                date_to = dateTo and datetime.strptime(
+                    dateTo, '%Y-%m-%d').date()
+            except ValueError:
+                raise ValueError(
+                    _('dateFrom and dateTo must be YYYY-MM-DD dates'))
+
+        def to_utc(day):
+            return tz.localize(
+                datetime.combine(day, datetime.min.time())
+            ).astimezone(UTC).replace(tzinfo=None)
+
+        if date_from:
+            domain.append(('planned_date_begin', '>=', to_utc(date_from)))
+        if date_to:
+            domain.append((
+                'planned_date_begin', '<',
+                to_utc(date_to + timedelta(days=1))
+            ))
+
+        if maxDistance:
+            try:
+                domain.append(('distance', '<=', float(maxDistance)))
+            except ValueError:
+                raise ValueError(_('maxDistance must be a number'))
+        return domain
+
+    def _is_deferred_sync(self):
+        """
+        Whether the sync side effects (tracking, notifications and FSM
+        validation) are replayed after the request
+        """
+        return request.env['ir.config_parameter'].sudo().get_param(
+            'field_service_api.deferred_sync'
+        ) in ('1', 'True', 'true')
+
+    def _wants_ndjson(self, format=None):
+        """
+        Whether the client asked for a NDJSON stream
+        """
+        return format == 'ndjson' or (
+            request.httprequest.accept_mimetypes.best
+            == ndjson.NDJSON_CONTENT_TYPE
+        )
+
+    def _is_supervisor(self, user):
+        return user.has_group('industry_fsm.group_fsm_manager')
+
+    def _generate_tasks_data(self, env, domain, with_users=False):
+        """
+        Yield the serialized tasks matching the domain, read by batches
+        of STREAM_BATCH_SIZE with the cache cleared between batches, so
+        memory does not grow with the number of tasks
+        """
+        task_model = env['project.task'].sudo()
+        last_id = 0
+        while True:
+            tasks = task_model.search(
+                domain + [('id', '>', last_id)],
+                order='id ASC',
+                limit=STREAM_BATCH_SIZE
+            )
+            if not tasks:
+                break
+
+            tasks.fetch(['name', 'planned_date_begin', 'date_deadline',
+                         'stage_id', 'priority', 'description',
+                         'partner_id', 'user_ids', 'distance'])
+            for task, task_data in zip(
+                tasks,
+                # the van of the supervisor says nothing of the technicians'
+                self._prepare_tasks_data(tasks, with_van=not with_users)
+            ):
+                if with_users:
+                    task_data['userIds'] = task.user_ids.ids
+                yield task_data
+
+            last_id = tasks[-1].id
+            env.invalidate_all()
+
+    def _get_offline_bundle_records(self, tasks):
+        """
+        Stages, material and equipment lines and products of the offline
+        bundle of the tasks
+        """
+        env = tasks.env
+        stages = env['project.task.type'].sudo().search([
+            ('project_ids', 'in', tasks.project_id.ids),
+            ('stage_sequence', '!=', False)
+        ], order='stage_sequence ASC')
+        material_lines = env['sale.order.line'].sudo().search([
+            ('task_id', 'in', tasks.ids),
+            ('product_uom_qty', '>', 0)
+        ])
+        equipment_lines = env['task.equipment'].sudo().search([
+            ('task_id', 'in', tasks.ids)
+        ])
+        products = (
+            material_lines.product_id | equipment_lines.equipment_id
+        ).sorted('id')
+        return stages, material_lines, equipment_lines, products
+
+    def _get_offline_bundle_version(self, tasks):
+        """
+        Hash of the records the offline bundle of the tasks is built from,
+        known before the bundle is streamed so it can be used as ETag
         """
-        Retrieve material lines for the task
+        stages, material_lines, equipment_lines, products = \
+            self._get_offline_bundle_records(tasks)
+
+        digest = hashlib.sha256()
+        digest.update(
+            f'{tasks.env.uid},{tasks.env.context.get("lang")}'.encode()
+        )
+        for records in (
+            tasks, tasks.partner_id, stages, material_lines,
+            equipment_lines, products
+        ):
+            for record in records.read(['write_date']):
+                digest.update(
+                    f'{records._name},{record["id"]},'
+                    f'{record["write_date"]};'.encode()
+                )
+        for product in products.read(['qty_available']):
+            digest.update(
+                f'{product["id"]},{product["qty_available"]};'.encode()
+            )
+        van_quantities = tasks.env.user._get_fsm_van_quantities(products.ids)
+        digest.update(str(sorted((van_quantities or {}).items())).encode())
+        return digest.hexdigest()
+
+    def _generate_offline_bundle(self, env, task_ids, version):
+        """
+        Yield the lines of the offline bundle of the tasks
         """
-        sale_order_lines = request.env['sale.order.line'].sudo().search([
-                ('task_id', '=', task.id),
+        tasks = env['project.task'].sudo().browse(task_ids)
+        stages, __, __, products = self._get_offline_bundle_records(tasks)
+
+        yield {
+            'type': 'bundle',
+            'version': version,
+            'userId': env.uid,
+            'generatedAt': datetime.now(UTC).isoformat(),
+        }
+        for stage in stages:
+            yield {
+                'type': 'stage',
+                'id': stage.stage_sequence,
+                'name': stage.name,
+            }
+        for start in range(0, len(tasks), STREAM_BATCH_SIZE):
+            batch = tasks[start:start + STREAM_BATCH_SIZE]
+            for task_data in self._prepare_tasks_data(batch):
+                yield dict(task_data, type='intervention')
+        van_quantities = env.user._get_fsm_van_quantities(products.ids)
+        for product in products:
+            yield {
+                'type': 'product',
+                'id': product.id,
+                'name': product.name,
+                'quantityAvailable': product.qty_available,
+                'quantityInVan': van_quantities.get(product.id, 0.0)
+                if van_quantities is not None else None,
+            }
+
+    def _get_material_lines(self, tasks):
+        """
+        Retrieve material lines for the tasks, grouped by task ID
+        """
+        sale_order_lines = tasks.env['sale.order.line'].sudo().search([
+                ('task_id', 'in', tasks.ids),
                 ('product_uom_qty', '>', 0)
             ])
 
-        material_lines = [
-                {
-                    'id': line.product_id.id,
-                    'name': line.product_id.name,
-                    'quantity': line.product_uom_qty
-                } for line in sale_order_lines
-            ]
+        material_lines = defaultdict(list)
+        for line in sale_order_lines:
+            material_lines[line.task_id.id].append({
+                'id': line.product_id.id,
+                'name': line.product_id.name,
+                'quantity': line.product_uom_qty
+            })
 
         return material_lines
 
@@ -622,19 +1665,73 @@ class FSMController(http.Controller):
             "Product synchronization completed for task %s", task.name
             )
 
-    def _get_required_equipment(self, task):
+    def _get_required_equipment(self, tasks):
         """
-        Retrieve required equipment for the task
+        Retrieve required equipment for the tasks, grouped by task ID
         """
-        equipment_lines = request.env['task.equipment'].sudo().search([
-                ('task_id', '=', task.id)
+        equipment_lines = tasks.env['task.equipment'].sudo().search([
+                ('task_id', 'in', tasks.ids)
             ])
 
-        equipments = [
-            {
+        equipments = defaultdict(list)
+        for line in equipment_lines:
+            equipments[line.task_id.id].append({
                 'id': line.equipment_id.id,
                 'name': line.equipment_id.name,
-            } for line in equipment_lines
-        ]
+            })
 
         return equipments
+
+    def _prepare_tasks_data(self, tasks, with_van=True):
+        """
+        Serialize interventions, reading their material and equipment
+        lines in one query per model for the whole recordset. With
+        `with_van`, materials get the quantity available in the van of the
+        current user.
+        """
+        material_lines = self._get_material_lines(tasks)
+        required_materials = self._get_required_equipment(tasks)
+
+        materials = [
+            material
+            for lines in (material_lines, required_materials)
+            for task_materials in lines.values()
+            for material in task_materials
+        ]
+        if with_van:
+            van_quantities = tasks.env.user._get_fsm_van_quantities(
+                {material['id'] for material in materials}
+            )
+            for material in materials:
+                material['quantityInVan'] = van_quantities.get(
+                    material['id'], 0.0
+                ) if van_quantities is not None else None
+
+        return [
+            {
+                'id': task.id,
+                'title': task.name,
+                'dateStart': task.planned_date_begin.astimezone(
+                    UTC).strftime('%d/%m/%Y')
+                if task.planned_date_begin else None,
+                'dateEnd': task.date_deadline.astimezone(
+                    UTC).strftime('%d/%m/%Y')
+                if task.date_deadline else None,
+                'status': task.stage_id.stage_sequence if task.stage_id
+                else None,
+                'priority': task.priority if task.priority else '',
+                'description': html2plaintext(task.description or ''),
+                'customer': task.partner_id.name if task.partner_id else '',
+                'long': task.partner_id.partner_longitude,
+                'lat': task.partner_id.partner_latitude,
+                'telephone': task.partner_id.phone
+                if task.partner_id.phone else '',
+                'address': re.sub(
+                    r'\s+', ' ',
+                    task.partner_id.contact_address or ''
+                ).strip(),
+                'distance': task.distance if task.distance else 0,
+                'materials': material_lines.get(task.id, []),
+                'materialRequired': required_materials.get(task.id, [])
+            } for task in tasks
+        ]
@@ -10,7 +10,7 @@ class PingController(http.Controller):
     @http.route(
         '/api/ping',
         type='http',
-        auth='public',
+        auth='fsm_bearer',
         methods=['GET', 'HEAD'],
         csrf=False,
         cors='*'
@@ -1,36 +1,49 @@
 import json
 from datetime import datetime
 from odoo.http import request
+from .request_log import timed
 
 
 class ApiResponse:
 
     @staticmethod
-    def success_response(message, data, status=200):
-        """Formats a success response"""
-        response = {
+    def success_body(message, data):
+        """JSON body of a success response, usable without `request`"""
+        return json.dumps({
             'success': True,
             'message': message,
             'data': data,
             'timestamp': datetime.now().isoformat()
-        }
+        }, default=str)
+
+    @staticmethod
+    def success_response(message, data, status=200, headers=None):
+        """Formats a success response"""
+        with timed('serialization'):
+            body = ApiResponse.success_body(message, data)
         return request.make_response(
-            json.dumps(response, default=str),
+            body,
             status=status,
-            headers=[('Content-Type', 'application/json')]
+            headers=[('Content-Type', 'application/json')] + (headers or [])
         )
 
     @staticmethod
-    def error_response(message, data, status=400):
-        """Formats an error response"""
-        response = {
+    def error_body(message, data):
+        """JSON body of an error response, usable without `request`"""
+        return json.dumps({
             'success': False,
             'message': message,
             'data': data,
             'timestamp': datetime.now().isoformat()
-        }
+        })
+
+    @staticmethod
+    def error_response(message, data, status=400, headers=None):
+        """Formats an error response"""
+        with timed('serialization'):
+            body = ApiResponse.error_body(message, data)
         return request.make_response(
-            json.dumps(response),
+            body,
             status=status,
-            headers=[('Content-Type', 'application/json')]
+            headers=[('Content-Type', 'application/json')] + (headers or [])
         )
@@ -0,0 +1,54 @@
+import json
+import logging
+import zlib
+
+from odoo import api
+from odoo.http import request
+
+_logger = logging.getLogger(__name__)
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def _gzip(chunks):
+    """Compress a stream of bytes chunks into a gzip stream"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def ndjson_response(generate, compress=False, headers=None):
+    """
+    Response streaming the dicts yielded by `generate(env)`, one JSON
+    document per line, optionally gzip compressed.
+
+    The body is produced while the response is sent, after the request
+    cursor has been closed: `generate` gets an environment on its own
+    cursor, with the request user and context, and must not use
+    `request`. The cursor is read-only (on the replica, if any) when the
+    request cursor is.
+    """
+    registry = request.env.registry
+    readonly = request.env.cr.readonly
+    uid = request.env.uid
+    context = dict(request.env.context)
+
+    def stream():
+        with registry.cursor(readonly=readonly) as cr:
+            env = api.Environment(cr, uid, context)
+            try:
+                for record in generate(env):
+                    yield json.dumps(record, default=str).encode() + b'\n'
+            except Exception as e:
+                _logger.error("Error while streaming NDJSON: %s", e)
+                yield json.dumps({'error': 'Server error'}).encode() + b'\n'
+
+    body = _gzip(stream()) if compress else stream()
+    content_type = 'application/gzip' if compress else NDJSON_CONTENT_TYPE
+    return request.make_response(
+        body,
+        headers=[('Content-Type', content_type)] + (headers or [])
+    )
@@ -0,0 +1,180 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from odoo import SUPERUSER_ID, _, api
+from odoo.http import request
+from .api_response import ApiResponse
+
+_logger = logging.getLogger(__name__)
+
+# Requests per period (seconds) per route class, overridable with the
+# `field_service_api.rate_limit.<class>` system parameter ("120/60").
+# "0" disables the limit of the class.
+DEFAULT_RATE_LIMITS = {
+    'read': '120/60',
+    'write': '60/60',
+    'sync': '10/60',
+    'auth': '20/60',
+    'auth_address': '100/60',
+    'refresh': '60/60',
+}
+
+# Maximum in-flight requests per user and route class, overridable with the
+# `field_service_api.concurrency.<class>` system parameter. "0" disables it.
+DEFAULT_CONCURRENCY = {
+    'sync': '2',
+}
+
+CONCURRENCY_RETRY_AFTER = 5
+
+# share of the capacity counted by a worker before it updates the shared
+# window, and bound of the windows counted by a worker
+FLUSH_RATIO = 0.1
+MAX_LOCAL_WINDOWS = 10000
+
+
+class _WindowCounter:
+    """Requests of a window: last shared total and not yet shared ones"""
+
+    __slots__ = ('end', 'seen', 'pending')
+
+    def __init__(self, end):
+        self.end = end
+        self.seen = 0
+        self.pending = 0
+
+
+_windows = {}
+_windows_lock = threading.Lock()
+
+
+def _get_param(key, default):
+    return request.env['ir.config_parameter'].sudo().get_param(key, default)
+
+
+def _slot_lock_key(route_class, slot):
+    """Signed 32 bits advisory lock key of a concurrency slot"""
+    key = f'field_service_api.{route_class}.{slot}'
+    return zlib.crc32(key.encode()) - 2 ** 31
+
+
+def hash_key(value):
+    """Digest of a secret (e.g. a token) usable as rate limit key"""
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def consume(route_class, key):
+    """
+    Count a request of `key` in the current window of the route class.
+    Returns a tuple (allowed, retry_after).
+
+    Requests are counted by fixed windows of the period. Each worker counts
+    locally and adds its count to the shared window row every
+    FLUSH_RATIO of the capacity, so most requests do not write to the
+    database. The limit may be exceeded by that share per worker.
+    """
+    limit = _get_param(
+        f'field_service_api.rate_limit.{route_class}',
+        DEFAULT_RATE_LIMITS.get(route_class, '0')
+    )
+    try:
+        capacity, period = (float(value) for value in limit.split('/'))
+    except ValueError:
+        capacity = period = 0
+    if capacity <= 0 or period <= 0:
+        return True, 0
+
+    now = time.time()
+    window = int(now // period)
+    window_end = (window + 1) * period
+    retry_after = max(1, math.ceil(window_end - now))
+    window_key = f'{route_class}:{key}:{window}'
+
+    with _windows_lock:
+        counter = _windows.get((request.db, window_key))
+        if counter is None:
+            if len(_windows) >= MAX_LOCAL_WINDOWS:
+                for expired in [
+                    item for item, value in _windows.items()
+                    if value.end <= now
+                ]:
+                    del _windows[expired]
+            counter = _windows[(request.db, window_key)] = _WindowCounter(
+                window_end)
+        if counter.seen + counter.pending >= capacity:
+            return False, retry_after
+        counter.pending += 1
+        if counter.pending < max(1, int(capacity * FLUSH_RATIO)):
+            return True, 0
+        pending, counter.pending = counter.pending, 0
+
+    try:
+        # own short transaction: windows must not be locked until the end
+        # of the request nor rolled back with it
+        with request.env.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            hits = env['fsm.api.rate.limit']._add_hits(
+                window_key, pending, period
+            )
+    except Exception as e:
+        _logger.warning("Rate limiter unavailable, request allowed: %s", e)
+        return True, 0
+
+    with _windows_lock:
+        counter.seen = max(counter.seen, hits)
+    if hits > capacity:
+        return False, retry_after
+    return True, 0
+
+
+@contextmanager
+def concurrency_slot(route_class, user_id):
+    """
+    Hold one of the in-flight slots of the user for the route class.
+    Yields False when all the slots are taken.
+
+    Slots are PostgreSQL advisory locks held on a dedicated connection,
+    so they are shared between workers and released if a worker dies.
+    """
+    max_concurrency = int(_get_param(
+        f'field_service_api.concurrency.{route_class}',
+        DEFAULT_CONCURRENCY.get(route_class, '0')
+    ) or 0)
+    if max_concurrency <= 0:
+        yield True
+        return
+
+    with request.env.registry.cursor() as cr:
+        for slot in range(max_concurrency):
+            cr.execute(
+                "SELECT pg_try_advisory_lock(%s, %s)",
+                (_slot_lock_key(route_class, slot), user_id)
+            )
+            if cr.fetchone()[0]:
+                break
+        else:
+            yield False
+            return
+        cr.commit()
+        try:
+            yield True
+        finally:
+            cr.execute(
+                "SELECT pg_advisory_unlock(%s, %s)",
+                (_slot_lock_key(route_class, slot), user_id)
+            )
+
+
+def too_many_requests(retry_after):
+    """429 response asking the client to retry after some seconds"""
+    return ApiResponse.error_response(
+        _("Too many requests"),
+        {'retryAfter': retry_after},
+        429,
+        headers=[('Retry-After', str(retry_after))]
+    )
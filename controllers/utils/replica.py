@@ -0,0 +1,47 @@
+import logging
+
+from odoo import SUPERUSER_ID, api
+from odoo.http import request
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# seconds after a write of the user during which their reads stay on the
+# primary database, overridable with `field_service_api.replica_stale_window`
+DEFAULT_STALE_WINDOW = 10
+
+
+def readonly_unless_recent_write(controller):
+    """
+    `readonly` of the read routes: they run on the read-only replica
+    (`db_replica_host` / `db_replica_port`) unless the user of the access
+    token wrote through the API in the last seconds, as the replica may not
+    have replayed those writes yet. Called before the authentication, out
+    of any transaction.
+    """
+    if not (config['db_replica_host'] or config['db_replica_port']):
+        return True
+
+    token = request.registry['ir.http']._get_fsm_bearer_token()
+    if not token:
+        return True
+
+    try:
+        with request.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            window = int(env['ir.config_parameter'].get_param(
+                'field_service_api.replica_stale_window',
+                DEFAULT_STALE_WINDOW
+            ) or 0)
+            if window <= 0:
+                return True
+            cr.execute("""
+                SELECT 1 FROM res_users
+                WHERE access_token = %s
+                  AND fsm_last_write_at >
+                      NOW() AT TIME ZONE 'UTC' - make_interval(secs => %s)
+            """, [token, window])
+            return not cr.rowcount
+    except Exception as e:
+        _logger.warning("Staleness check failed, using the primary: %s", e)
+        return False
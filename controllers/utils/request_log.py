@@ -0,0 +1,145 @@
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from odoo.http import request
+
+_logger = logging.getLogger(__name__)
+
+# requests slower than this (ms) are logged, overridable with the
+# `field_service_api.slow_request_threshold` system parameter, "0" disables
+DEFAULT_SLOW_REQUEST_THRESHOLD = 1000
+SLOW_QUERIES_LOGGED = 5
+QUERY_LOG_SIZE = 500
+
+VALID_REQUEST_ID = re.compile(r'^[\w.-]{1,64}$')
+
+_state = threading.local()
+
+
+def get_request_id():
+    """ID of the API request processed by the current thread, if any"""
+    return getattr(_state, 'request_id', None)
+
+
+class RequestIdFilter(logging.Filter):
+    """Prefix the log lines with the ID of the current API request"""
+
+    def filter(self, record):
+        request_id = get_request_id()
+        if request_id:
+            record.msg = f"[{request_id}] {record.msg}"
+        return True
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to the phase of the request"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = getattr(_state, 'phases', None)
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + (
+                time.perf_counter() - start)
+
+
+def parse_json_body():
+    """JSON body of the request, timed as parsing"""
+    with timed('parsing'):
+        return json.loads(request.httprequest.data.decode('utf-8'))
+
+
+class _RequestTracker:
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.slowest = []
+
+    def query_hook(self, cr, query, params, start, delay, *args):
+        self.sql_count += 1
+        self.sql_time += delay
+        entry = (delay, self.sql_count, str(query)[:QUERY_LOG_SIZE])
+        if len(self.slowest) < SLOW_QUERIES_LOGGED:
+            heapq.heappush(self.slowest, entry)
+        elif delay > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def log(self, request_id, response):
+        duration = time.perf_counter() - self.start
+        if duration * 1000 < self.threshold:
+            return
+
+        phases = _state.phases
+        parsing = phases.get('parsing', 0.0)
+        serialization = phases.get('serialization', 0.0)
+        _logger.warning("%s", json.dumps({
+            'event': 'slow_request',
+            'requestId': request_id,
+            'method': request.httprequest.method,
+            'route': request.httprequest.path,
+            'userId': request.env.uid,
+            'status': response.status_code if response else None,
+            'payloadSize': request.httprequest.content_length or 0,
+            'durationMs': round(duration * 1000, 1),
+            'parsingMs': round(parsing * 1000, 1),
+            'ormMs': round((duration - parsing - serialization) * 1000, 1),
+            'serializationMs': round(serialization * 1000, 1),
+            'sqlCount': self.sql_count,
+            'sqlMs': round(self.sql_time * 1000, 1),
+            'slowestQueries': [
+                {'ms': round(delay * 1000, 1), 'query': query}
+                for delay, _index, query in sorted(self.slowest, reverse=True)
+            ],
+        }))
+
+
+def track_request(dispatch):
+    """
+    Run `dispatch()` (the API endpoint) with a request ID, sent back in the
+    `X-Request-ID` header (the client's one is reused when valid) and
+    prefixed to the controller logs. Requests slower than the threshold are
+    logged as one JSON record with their SQL and phase breakdown.
+    Streamed bodies are produced after this and are not accounted.
+    """
+    request_id = request.httprequest.headers.get('X-Request-ID', '')
+    if not VALID_REQUEST_ID.match(request_id):
+        request_id = uuid.uuid4().hex
+    threshold = int(request.env['ir.config_parameter'].sudo().get_param(
+        'field_service_api.slow_request_threshold',
+        DEFAULT_SLOW_REQUEST_THRESHOLD
+    ) or 0)
+
+    tracker = _RequestTracker(threshold) if threshold > 0 else None
+    thread = threading.current_thread()
+    if tracker:
+        if not hasattr(thread, 'query_hooks'):
+            thread.query_hooks = []
+        thread.query_hooks.append(tracker.query_hook)
+    _state.request_id = request_id
+    _state.phases = {}
+
+    response = None
+    try:
+        response = dispatch()
+        response.headers['X-Request-ID'] = request_id
+        return response
+    finally:
+        try:
+            if tracker:
+                thread.query_hooks.remove(tracker.query_hook)
+                tracker.log(request_id, response)
+        except Exception as e:
+            _logger.warning("Failed to log the request %s: %s",
+                            request_id, e)
+        _state.request_id = None
+        _state.phases = None
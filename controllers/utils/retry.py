@@ -0,0 +1,50 @@
+import functools
+import logging
+
+from odoo import _
+from odoo.http import request
+from odoo.service.model import (
+    MAX_TRIES_ON_CONCURRENCY_FAILURE,
+    PG_CONCURRENCY_EXCEPTIONS_TO_RETRY,
+)
+from .api_response import ApiResponse
+
+_logger = logging.getLogger(__name__)
+
+CONCURRENCY_ERRORS = PG_CONCURRENCY_EXCEPTIONS_TO_RETRY
+
+
+def retry_on_concurrency_failure(f):
+    """
+    Decorator logging the concurrent update failures of the route, which
+    Odoo then runs again in a new transaction (`odoo.service.model.retrying`).
+    The last attempt answers a 409 instead of a server error.
+    The route must let CONCURRENCY_ERRORS propagate.
+    """
+    @functools.wraps(f)
+    def retry_wrapper(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except CONCURRENCY_ERRORS as e:
+            # the same request is dispatched again on each attempt
+            attempt = getattr(request, '_fsm_concurrency_attempt', 0) + 1
+            request._fsm_concurrency_attempt = attempt
+            _logger.info(
+                "metric=fsm_api.concurrency_failure route=%s user=%s "
+                "attempt=%s pgcode=%s",
+                request.httprequest.path, request.env.uid, attempt, e.pgcode
+            )
+            if attempt < MAX_TRIES_ON_CONCURRENCY_FAILURE:
+                raise
+
+            request.env.cr.rollback()
+            _logger.warning(
+                "Giving up %s after %s concurrent update failures",
+                request.httprequest.path, attempt
+            )
+            return ApiResponse.error_response(
+                _("Concurrent update, please retry"), None, 409,
+                headers=[('Retry-After', '1')]
+            )
+
+    return retry_wrapper
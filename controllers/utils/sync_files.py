@@ -0,0 +1,54 @@
+import base64
+import hashlib
+import logging
+import mimetypes
+from collections import namedtuple
+
+from odoo.tools.mimetypes import guess_mimetype
+
+_logger = logging.getLogger(__name__)
+
+PreparedFile = namedtuple('PreparedFile', ['raw', 'checksum', 'mimetype'])
+
+
+def file_key(file):
+    """Key of a `{filename, data}` file of the sync payload"""
+    return file.get('filename'), file.get('data')
+
+
+def get_payload_files(task_data):
+    """All the files of a task of the sync payload"""
+    files = list(task_data.get('images', []))
+    files.extend(task_data.get('documents', []))
+    for comment in task_data.get('comments', []):
+        files.extend(comment.get('attachmentFiles', []))
+    if task_data.get('signature'):
+        files.append(task_data['signature'])
+    return files
+
+
+def _prepare_file(filename, encoded_data):
+    """
+    Decode a base64 file and compute its checksum and mimetype the way
+    ir.attachment does (from the name, then from the content)
+    """
+    try:
+        raw = base64.b64decode(encoded_data)
+    except Exception as e:
+        _logger.warning("File %s ignored, invalid content: %s", filename, e)
+        return None
+    return PreparedFile(
+        raw=raw,
+        checksum=hashlib.sha1(raw).hexdigest(),
+        mimetype=mimetypes.guess_type(filename)[0] or guess_mimetype(raw),
+    )
+
+
+def prepare_files(files):
+    """
+    Decode the files, once per distinct file.
+    Returns a dict {file_key: PreparedFile}, the value is None for files
+    which could not be decoded. Files without name or data are skipped.
+    """
+    keys = {file_key(file) for file in files if all(file_key(file))}
+    return {key: _prepare_file(*key) for key in keys}
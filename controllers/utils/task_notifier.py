@@ -0,0 +1,85 @@
+import json
+import logging
+import selectors
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import odoo
+from odoo.addons.bus.models.bus import hashable
+
+_logger = logging.getLogger(__name__)
+
+LISTEN_TIMEOUT = 50
+
+
+class TaskChangeDispatcher(threading.Thread):
+    """
+    Wake up the requests waiting for task changes.
+
+    One thread per worker listens on the bus ``imbus`` channel and sets
+    the events of the requests subscribed to the notified channels. The
+    requests wait in their response body, after their cursor is released,
+    and only borrow a connection to read the changes once woken up: the
+    waiting requests do not hold a database connection each.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True, name=f'{__name__}.TaskChangeDispatcher')
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def subscribe(self, channel):
+        """
+        Yield an event set whenever a notification is sent on the channel
+        """
+        event = threading.Event()
+        with self._lock:
+            if self.ident is None:
+                self.start()
+            self._channels[hashable(channel)].add(event)
+        try:
+            yield event
+        finally:
+            with self._lock:
+                events = self._channels[hashable(channel)]
+                events.discard(event)
+                if not events:
+                    del self._channels[hashable(channel)]
+
+    def run(self):
+        while True:
+            try:
+                self._loop()
+            except Exception:
+                _logger.exception("Task change dispatcher error")
+                time.sleep(LISTEN_TIMEOUT)
+
+    def _loop(self):
+        _logger.info("Task change dispatcher listening on imbus")
+        with odoo.sql_db.db_connect('postgres').cursor() as cr, \
+                selectors.DefaultSelector() as sel:
+            cr.execute("listen imbus")
+            cr.commit()
+            conn = cr._cnx
+            sel.register(conn, selectors.EVENT_READ)
+            while True:
+                if not sel.select(LISTEN_TIMEOUT):
+                    continue
+                conn.poll()
+                channels = []
+                while conn.notifies:
+                    channels.extend(json.loads(conn.notifies.pop().payload))
+                with self._lock:
+                    events = [
+                        event
+                        for channel in channels
+                        for event in self._channels.get(hashable(channel), ())
+                    ]
+                for event in events:
+                    event.set()
+
+
+dispatcher = TaskChangeDispatcher()
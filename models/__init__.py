@@ -1,6 +1,15 @@
 # -*- coding: utf-8 -*-
 
+from . import account_analytic_line
+from . import api_rate_limit
+from . import api_refresh_token
+from . import ir_attachment
+from . import ir_http
+from . import product_product
 from . import project_task
 from . import project_task_type
 from . import res_users
+from . import stock_quant
+from . import sync_deferred_action
 from . import task_equipment
+from . import workload_summary
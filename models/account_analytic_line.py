@@ -0,0 +1,30 @@
+from odoo import models, api
+
+
+class AccountAnalyticLine(models.Model):
+
+    _inherit = 'account.analytic.line'
+
+    # fields of the technician workload summary
+    _WORKLOAD_FIELDS = {'unit_amount', 'task_id'}
+
+    def _schedule_workload_refresh(self, task_id=None):
+        """Refresh the workload summary if the timesheets are on FSM tasks"""
+        tasks = self.task_id | self.env['project.task'].browse(task_id)
+        if any(task.is_fsm for task in tasks):
+            self.env['fsm.workload.summary']._schedule_refresh()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        lines._schedule_workload_refresh()
+        return lines
+
+    def write(self, vals):
+        if self._WORKLOAD_FIELDS.intersection(vals):
+            self._schedule_workload_refresh(vals.get('task_id'))
+        return super().write(vals)
+
+    def unlink(self):
+        self._schedule_workload_refresh()
+        return super().unlink()
@@ -0,0 +1,41 @@
+from odoo import api, fields, models
+
+
+class ApiRateLimit(models.Model):
+
+    _name = 'fsm.api.rate.limit'
+    _description = 'API Rate Limit Window'
+
+    key = fields.Char(string='Key', required=True)
+    hits = fields.Integer(string='Hits')
+    expires_at = fields.Datetime(string='Expires At')
+
+    _sql_constraints = [
+        ('key_unique', 'unique(key)', 'The window key must be unique!'),
+    ]
+
+    def _add_hits(self, key, hits, period):
+        """
+        Add `hits` to the window `key`, kept `period` seconds, in a single
+        atomic statement.
+        Returns the total hits of the window, all workers included.
+        """
+        self.env.cr.execute("""
+            INSERT INTO fsm_api_rate_limit AS window_row
+                (key, hits, expires_at)
+            VALUES (%(key)s, %(hits)s, NOW() AT TIME ZONE 'UTC'
+                    + make_interval(secs => %(period)s))
+            ON CONFLICT (key) DO UPDATE
+                SET hits = window_row.hits + EXCLUDED.hits
+            RETURNING hits
+        """, {'key': key, 'hits': hits, 'period': period})
+        return self.env.cr.fetchone()[0]
+
+    @api.autovacuum
+    def _gc_windows(self):
+        """Remove the past windows"""
+        self.env.cr.execute("""
+            DELETE FROM fsm_api_rate_limit
+            WHERE expires_at IS NULL
+               OR expires_at < NOW() AT TIME ZONE 'UTC'
+        """)
@@ -0,0 +1,117 @@
+import datetime
+import hashlib
+import logging
+import secrets
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# lifetime (days) of the refresh tokens, overridable with the
+# `field_service_api.refresh_token_lifetime` system parameter
+DEFAULT_REFRESH_TOKEN_LIFETIME = 30
+
+
+class ApiRefreshToken(models.Model):
+
+    _name = 'fsm.api.refresh.token'
+    _description = 'API Refresh Token'
+
+    user_id = fields.Many2one(
+        'res.users', string='User', required=True, ondelete='cascade',
+        index=True
+    )
+    token_hash = fields.Char(string='Token Hash', required=True)
+    family = fields.Char(
+        string='Family', required=True, index=True,
+        help='Shared by the tokens rotated from the same login'
+    )
+    expiry = fields.Datetime(string='Expiry', required=True)
+    used = fields.Boolean(string='Used')
+
+    _sql_constraints = [
+        ('token_hash_unique', 'unique(token_hash)',
+         'The refresh token must be unique!'),
+    ]
+
+    @api.model
+    def _hash_token(self, token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @api.model
+    def _issue(self, user, family=None):
+        """
+        Create a refresh token for the user, in a new family (a login) or
+        in the family of the rotated token. Only its hash is stored.
+        Returns the token.
+        """
+        lifetime = int(self.env['ir.config_parameter'].sudo().get_param(
+            'field_service_api.refresh_token_lifetime',
+            DEFAULT_REFRESH_TOKEN_LIFETIME
+        ))
+        token = secrets.token_urlsafe(32)
+        self.create({
+            'user_id': user.id,
+            'token_hash': self._hash_token(token),
+            'family': family or secrets.token_hex(16),
+            'expiry': datetime.datetime.now() + datetime.timedelta(
+                days=lifetime),
+        })
+        return token
+
+    @api.model
+    def _get_family(self, token):
+        """Family of the refresh token, used or not, None if unknown"""
+        return self.search([
+            ('token_hash', '=', self._hash_token(token))
+        ], limit=1).family or None
+
+    @api.model
+    def _rotate(self, token):
+        """
+        Exchange a refresh token for a new one of the same family, in a
+        single statement on the token hash. A refresh token is usable once:
+        when a used one is presented again, it was stolen or replayed and
+        its whole family is revoked.
+        Returns a tuple (user, new token), user is empty if the token is
+        not valid.
+        """
+        token_hash = self._hash_token(token)
+        self.env.cr.execute("""
+            UPDATE fsm_api_refresh_token
+            SET used = TRUE
+            WHERE token_hash = %s
+              AND used IS NOT TRUE
+              AND expiry > NOW() AT TIME ZONE 'UTC'
+            RETURNING user_id, family
+        """, [token_hash])
+        row = self.env.cr.fetchone()
+        if not row:
+            reused = self.search([
+                ('token_hash', '=', token_hash), ('used', '=', True)
+            ])
+            if reused:
+                _logger.warning(
+                    "Refresh token reused, revoking the tokens of user %s",
+                    reused.user_id.id
+                )
+                self.search([('family', '=', reused.family)]).unlink()
+            return self.env['res.users'], None
+
+        user_id, family = row
+        user = self.env['res.users'].browse(user_id)
+        if not user.active:
+            return self.env['res.users'], None
+        return user, self._issue(user, family)
+
+    @api.model
+    def _revoke_user_tokens(self, user):
+        self.search([('user_id', '=', user.id)]).unlink()
+
+    @api.autovacuum
+    def _gc_expired_tokens(self):
+        """Remove the expired refresh tokens"""
+        self.env.cr.execute("""
+            DELETE FROM fsm_api_refresh_token
+            WHERE expiry < NOW() AT TIME ZONE 'UTC'
+        """)
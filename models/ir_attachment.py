@@ -0,0 +1,153 @@
+import io
+import logging
+import os
+
+from odoo import api, fields, models
+from odoo.tools.image import ImageProcess
+
+_logger = logging.getLogger(__name__)
+
+PROCESSED_MIMETYPES = ('image/jpeg', 'image/png', 'image/webp')
+OUTPUT_MIMETYPES = {
+    'JPEG': ('image/jpeg', '.jpg'),
+    'PNG': ('image/png', '.png'),
+    'WEBP': ('image/webp', '.webp'),
+}
+PROCESSING_BATCH_SIZE = 50
+
+
+class IrAttachment(models.Model):
+
+    _inherit = 'ir.attachment'
+
+    fsm_image_state = fields.Selection(
+        [('pending', 'To Process'), ('done', 'Processed')],
+        string='Image Processing',
+        index='btree_not_null',
+        readonly=True
+    )
+    fsm_thumbnail_id = fields.Many2one(
+        'ir.attachment',
+        string='Thumbnail',
+        ondelete='set null',
+        readonly=True
+    )
+    fsm_upload_checksum = fields.Char(
+        string='Uploaded Checksum',
+        index='btree_not_null',
+        readonly=True,
+        help='SHA1 of the file as synchronized, kept after the image '
+             'processing to recognize files sent again'
+    )
+
+    def unlink(self):
+        # the thumbnails only exist for their original, do not leave their
+        # files in the filestore
+        thumbnails = self.sudo().fsm_thumbnail_id - self
+        res = super().unlink()
+        thumbnails.unlink()
+        return res
+
+    def _fsm_schedule_image_processing(self):
+        """
+        Queue the uploaded images for resizing and thumbnail generation,
+        done by a cron so the upload request does not wait for it
+        """
+        images = self.filtered(
+            lambda attachment: attachment.mimetype in PROCESSED_MIMETYPES
+        )
+        if images:
+            images.write({'fsm_image_state': 'pending'})
+            self.env.ref(
+                'field_service_api.ir_cron_fsm_process_images'
+            )._trigger()
+
+    @api.model
+    def _cron_fsm_process_images(self):
+        # without a res_field clause, field attachments (the signatures)
+        # would be filtered out
+        attachments = self.search(
+            [
+                ('fsm_image_state', '=', 'pending'),
+                '|', ('res_field', '=', False), ('res_field', '!=', False)
+            ],
+            limit=PROCESSING_BATCH_SIZE + 1
+        )
+        attachments[:PROCESSING_BATCH_SIZE]._fsm_process_images()
+        if len(attachments) > PROCESSING_BATCH_SIZE:
+            self.env.ref(
+                'field_service_api.ir_cron_fsm_process_images'
+            )._trigger()
+
+    def _fsm_process_images(self):
+        """
+        Recompress the images to the configured size, quality and format,
+        keeping the original when it is smaller, and store a thumbnail
+        alongside. Signatures are kept in PNG for their transparency.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        max_size = int(params.get_param(
+            'field_service_api.image_max_size', 1920))
+        thumbnail_size = int(params.get_param(
+            'field_service_api.image_thumbnail_size', 256))
+        quality = int(params.get_param(
+            'field_service_api.image_quality', 80))
+        image_format = params.get_param(
+            'field_service_api.image_format', 'JPEG').upper()
+        if image_format not in OUTPUT_MIMETYPES:
+            image_format = 'JPEG'
+
+        for attachment in self:
+            try:
+                with self.env.cr.savepoint():
+                    attachment._fsm_process_image(
+                        max_size, thumbnail_size, quality, image_format)
+            except Exception as e:
+                _logger.warning(
+                    "Image processing failed for attachment %s: %s",
+                    attachment.id, e
+                )
+                attachment.fsm_image_state = 'done'
+
+    def _fsm_process_image(self, max_size, thumbnail_size, quality,
+                           image_format):
+        self.ensure_one()
+        raw = self.raw
+        output_format = 'PNG' if self.res_field else image_format
+        mimetype, extension = OUTPUT_MIMETYPES[output_format]
+
+        values = {'fsm_image_state': 'done'}
+        resized = self._fsm_image_derivative(
+            raw, max_size, quality, output_format)
+        if len(resized) < len(raw):
+            values.update({
+                'raw': resized,
+                'mimetype': mimetype,
+            })
+            if not self.res_field:
+                values['name'] = os.path.splitext(self.name)[0] + extension
+
+        thumbnail = self.create({
+            'name': f'thumbnail_{values.get("name", self.name)}',
+            'raw': self._fsm_image_derivative(
+                raw, thumbnail_size, quality, output_format),
+            'mimetype': mimetype,
+            'res_model': 'ir.attachment',
+            'res_id': self.id,
+        })
+        self.fsm_thumbnail_id.unlink()
+        values['fsm_thumbnail_id'] = thumbnail.id
+        self.write(values)
+
+    @api.model
+    def _fsm_image_derivative(self, raw, size, quality, output_format):
+        """Return the image resized to fit in `size` and recompressed"""
+        image = ImageProcess(raw)
+        image.resize(max_width=size, max_height=size)
+        if output_format != 'WEBP':
+            return image.image_quality(
+                quality=quality, output_format=output_format)
+
+        output = io.BytesIO()
+        image.image.save(output, format='WEBP', quality=quality)
+        return output.getvalue()
@@ -0,0 +1,51 @@
+import logging
+
+from odoo import models
+from odoo.http import request
+from ..controllers.utils import request_log
+
+_logger = logging.getLogger(__name__)
+
+
+class IrHttp(models.AbstractModel):
+
+    _inherit = 'ir.http'
+
+    @classmethod
+    def _get_fsm_bearer_token(cls):
+        """Access token of the Authorization header, if any"""
+        token = request.httprequest.headers.get('Authorization')
+        if token and token.startswith('Bearer '):
+            token = token.split(' ')[1]
+        return token
+
+    @classmethod
+    def _auth_method_fsm_bearer(cls):
+        """
+        Sessionless authentication of the /api routes: the access token is
+        resolved straight into the request environment and the session is
+        neither saved nor sent back as a cookie. Without a valid token the
+        request runs as the public user, routes decorated with
+        `token_required` then answer with a 401.
+        """
+        request.session.can_save = False
+
+        user = request.env['res.users']
+        token = cls._get_fsm_bearer_token()
+        if token:
+            try:
+                user = user._get_user_from_access_token(token)
+            except Exception as e:
+                _logger.error("Error token validation: %s", e)
+
+        request.update_env(
+            user=user.id or request.env.ref('base.public_user').id
+        )
+
+    @classmethod
+    def _dispatch(cls, endpoint):
+        if not request.httprequest.path.startswith('/api/'):
+            return super()._dispatch(endpoint)
+        return request_log.track_request(
+            lambda: super(IrHttp, cls)._dispatch(endpoint)
+        )
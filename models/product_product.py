@@ -0,0 +1,30 @@
+import logging
+
+from odoo import models
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+
+class ProductProduct(models.Model):
+
+    _inherit = 'product.product'
+
+    def init(self):
+        super().init()
+        # default_code is searched with ilike by the materials endpoint; the
+        # btree index of `product` cannot serve it, and an `index` change
+        # on the field would not replace it (indexes are checked by name)
+        if not self.env.registry.has_trigram:
+            _logger.warning(
+                "pg_trgm is not installed, the materials search on the "
+                "internal reference is not indexed"
+            )
+            return
+        create_index(
+            self.env.cr,
+            'product_product_default_code_trgm_index',
+            self._table,
+            ['default_code gin_trgm_ops'],
+            method='gin'
+        )
@@ -1,13 +1,27 @@
 import math
+from collections import defaultdict
+
 from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+TASK_CHANGED_NOTIFICATION = 'field_service_api/task_changed'
 
 
 class ProjectTask(models.Model):
 
     _inherit = 'project.task'
 
+    _ASSIGNMENT_FIELDS = {
+        'user_ids', 'planned_date_begin', 'date_deadline', 'stage_id'
+    }
+    # fields of the technician workload summary
+    _WORKLOAD_FIELDS = {
+        'user_ids', 'date_deadline', 'stage_id', 'allocated_hours',
+        'partner_id', 'project_id', 'active'
+    }
+
     distance = fields.Float(string="Distance (km)", readonly=True,
-                            compute="_compute_distance")
+                            compute="_compute_distance", store=True)
     required_equipment_ids = fields.One2many(
         'task.equipment',
         'task_id',
@@ -29,7 +43,21 @@ class ProjectTask(models.Model):
         distance = round(R * c, 2)
         return distance
 
-    @api.depends('partner_id', 'company_id')
+    def init(self):
+        super().init()
+        # date window filters of the interventions list
+        create_index(
+            self.env.cr,
+            'project_task_planned_date_begin_index',
+            self._table,
+            ['planned_date_begin'],
+            where='planned_date_begin IS NOT NULL'
+        )
+
+    @api.depends('partner_id.partner_latitude',
+                 'partner_id.partner_longitude',
+                 'company_id.partner_id.partner_latitude',
+                 'company_id.partner_id.partner_longitude')
     def _compute_distance(self):
         for task in self:
 
@@ -48,3 +76,44 @@ class ProjectTask(models.Model):
                     lat1, lon1, lat2, lon2)
             else:
                 task.distance = 0.0
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        tasks = super().create(vals_list)
+        tasks._notify_assignment_changes()
+        if any(task.is_fsm for task in tasks):
+            self.env['fsm.workload.summary']._schedule_refresh()
+        return tasks
+
+    def write(self, vals):
+        if self._WORKLOAD_FIELDS.intersection(vals) and any(
+            task.is_fsm for task in self
+        ):
+            self.env['fsm.workload.summary']._schedule_refresh()
+        if not self._ASSIGNMENT_FIELDS.intersection(vals):
+            return super().write(vals)
+
+        previous_users = {task.id: task.user_ids for task in self}
+        res = super().write(vals)
+        self._notify_assignment_changes(previous_users)
+        return res
+
+    def _notify_assignment_changes(self, previous_users=None):
+        """
+        Send the IDs of the changed FSM tasks on the bus channel of each
+        technician assigned to them, before or after the change
+        """
+        previous_users = previous_users or {}
+        task_ids_by_partner = defaultdict(set)
+        for task in self.filtered('is_fsm'):
+            users = task.user_ids | previous_users.get(
+                task.id, self.env['res.users'])
+            for user in users:
+                task_ids_by_partner[user.partner_id].add(task.id)
+
+        for partner, task_ids in task_ids_by_partner.items():
+            self.env['bus.bus']._sendone(
+                partner,
+                TASK_CHANGED_NOTIFICATION,
+                {'taskIds': sorted(task_ids)}
+            )
@@ -2,24 +2,50 @@ from odoo import models, fields
 import datetime
 import secrets
 
+# lifetime (minutes) of the access tokens, renewed by the app with its refresh
+# token, overridable with `field_service_api.access_token_lifetime`
+DEFAULT_ACCESS_TOKEN_LIFETIME = 60
+
 
 class ResUsers(models.Model):
 
     _inherit = 'res.users'
-    access_token = fields.Char(string="Access token", readonly=True)
+    access_token = fields.Char(string="Access token", readonly=True,
+                               index='btree_not_null')
     token_expiry = fields.Datetime(string="Token Expiry", readonly=True)
+    fsm_location_id = fields.Many2one(
+        'stock.location',
+        string="Van Location",
+        domain=[('usage', '=', 'internal')],
+        help="Stock location of the technician's van, used to compute "
+             "the materials available to them"
+    )
+    fsm_last_write_at = fields.Datetime(
+        string="Last API Write", readonly=True,
+        help="Last write of the user through the API, their reads are not "
+             "routed to the read-only replica shortly after it"
+    )
     
     def generate_access_token(self):
         token = secrets.token_urlsafe(32)
-        expiry = datetime.datetime.now() + datetime.timedelta(hours=24)
+        expiry = datetime.datetime.now() + datetime.timedelta(
+            minutes=self._get_access_token_lifetime())
         
         self.sudo().write({
             'access_token': token,
-            'token_expiry': expiry
+            'token_expiry': expiry,
+            'fsm_last_write_at': fields.Datetime.now(),
         })
         
         return token
     
+    def _get_access_token_lifetime(self):
+        """Lifetime (minutes) of the access tokens"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'field_service_api.access_token_lifetime',
+            DEFAULT_ACCESS_TOKEN_LIFETIME
+        ))
+
     def check_token_validity(self, token):
         if not token or not self.access_token:
             return False
@@ -33,8 +59,52 @@ class ResUsers(models.Model):
         
         return False
 
+    def _get_user_from_access_token(self, token):
+        """
+        User owning the valid access token, or an empty recordset
+        """
+        user = self.sudo().search([('access_token', '=', token)], limit=1)
+        if not user or not user.check_token_validity(token):
+            return self.browse()
+        return user
+
+    def _fsm_mark_api_write(self):
+        """
+        Record that the users just wrote through the API, without the
+        overhead of a `write` on res.users
+        """
+        self.env.cr.execute("""
+            UPDATE res_users SET fsm_last_write_at = NOW() AT TIME ZONE 'UTC'
+            WHERE id = ANY(%s)
+        """, [self.ids])
+        self.invalidate_recordset(['fsm_last_write_at'])
+
     def reset_token(self):
         self.sudo().write({
             'access_token': False,
             'token_expiry': False
         })
+
+    def _get_fsm_van_quantities(self, product_ids):
+        """
+        Quantities of the products available (on hand minus reserved) in
+        the van location of the user and its sublocations, in one grouped
+        read. Returns None when the user has no van location.
+        """
+        self.ensure_one()
+        location = self.sudo().fsm_location_id
+        if not location:
+            return None
+
+        groups = self.env['stock.quant'].sudo()._read_group(
+            [
+                ('location_id', 'child_of', location.id),
+                ('product_id', 'in', list(product_ids))
+            ],
+            ['product_id'],
+            ['quantity:sum', 'reserved_quantity:sum']
+        )
+        return {
+            product.id: quantity - reserved
+            for product, quantity, reserved in groups
+        }
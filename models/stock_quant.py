@@ -0,0 +1,17 @@
+from odoo import models
+from odoo.tools.sql import create_index
+
+
+class StockQuant(models.Model):
+
+    _inherit = 'stock.quant'
+
+    def init(self):
+        super().init()
+        # MAX(write_date) is the stock version of the materials cache
+        create_index(
+            self.env.cr,
+            'stock_quant_write_date_index',
+            self._table,
+            ['write_date']
+        )
@@ -0,0 +1,92 @@
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# context of the writes done during a deferred sync: no tracking messages,
+# followers notifications nor creation logs on the request path
+DEFERRED_SYNC_CONTEXT = {
+    'tracking_disable': True,
+    'mail_notrack': True,
+    'mail_create_nolog': True,
+    'mail_auto_subscribe_no_notify': True,
+}
+REPLAY_BATCH_SIZE = 100
+
+
+class SyncDeferredAction(models.Model):
+
+    _name = 'fsm.sync.deferred.action'
+    _description = 'Deferred Sync Side Effects'
+    _order = 'id'
+
+    task_id = fields.Many2one(
+        'project.task', string='Task', required=True, ondelete='cascade',
+        index=True
+    )
+    user_id = fields.Many2one(
+        'res.users', string='Synchronized By', required=True,
+        ondelete='cascade'
+    )
+    initial_stage_id = fields.Many2one(
+        'project.task.type', string='Initial Stage', ondelete='set null'
+    )
+    validate = fields.Boolean(string='Validate Task')
+
+    @api.model
+    def _defer_stage_change(self, task, validate=False):
+        """
+        Record the side effects of a stage change written without tracking,
+        before the write: the tracking message (and the notifications and
+        templates of the stage change) and the FSM validation
+        """
+        action = self.search([('task_id', '=', task.id)], limit=1)
+        if action:
+            # keep the first initial stage, the tracking covers both changes
+            action.validate = action.validate or validate
+        else:
+            self.create({
+                'task_id': task.id,
+                'user_id': self.env.user.id,
+                'initial_stage_id': task.stage_id.id,
+                'validate': validate,
+            })
+        self.env.ref(
+            'field_service_api.ir_cron_fsm_replay_sync_side_effects'
+        )._trigger()
+
+    @api.model
+    def _cron_replay(self):
+        actions = self.search([], limit=REPLAY_BATCH_SIZE + 1)
+        actions[:REPLAY_BATCH_SIZE]._replay()
+        if len(actions) > REPLAY_BATCH_SIZE:
+            self.env.ref(
+                'field_service_api.ir_cron_fsm_replay_sync_side_effects'
+            )._trigger()
+
+    def _replay(self):
+        """
+        Post the stage tracking and send the stage templates as the
+        technician who synchronized, then validate the task
+        """
+        for action in self:
+            task = action.task_id.with_user(action.user_id).sudo()
+            try:
+                with self.env.cr.savepoint():
+                    tracking = task._message_track(
+                        ['stage_id'],
+                        {task.id: {'stage_id': action.initial_stage_id}}
+                    )
+                    # stage mail / SMS / rating templates, as _track_finalize
+                    if tracking.get(task.id):
+                        task._message_track_post_template(
+                            tracking[task.id][0])
+                    if action.validate:
+                        task.action_fsm_validate()
+            except Exception as e:
+                _logger.warning(
+                    "Failed to replay the sync side effects of task %s: %s",
+                    task.id, e
+                )
+        self.unlink()
@@ -0,0 +1,77 @@
+import datetime
+
+from odoo import api, fields, models
+
+
+class WorkloadSummary(models.Model):
+
+    _name = 'fsm.workload.summary'
+    _description = 'Technician Workload'
+    _auto = False
+    _order = 'user_id'
+
+    user_id = fields.Many2one('res.users', string='Technician', readonly=True)
+    open_count = fields.Integer(string='Open Interventions', readonly=True)
+    late_count = fields.Integer(string='Late Interventions', readonly=True)
+    planned_hours = fields.Float(string='Planned Hours', readonly=True)
+    spent_hours = fields.Float(string='Spent Hours', readonly=True)
+    distance = fields.Float(string='Distance (km)', readonly=True)
+    refreshed_at = fields.Datetime(string='Refreshed At', readonly=True)
+
+    def init(self):
+        """
+        Materialized view of the open interventions of each technician,
+        with the unique index REFRESH ... CONCURRENTLY requires
+        """
+        self.env.cr.execute(f"""
+            DROP MATERIALIZED VIEW IF EXISTS {self._table};
+            CREATE MATERIALIZED VIEW {self._table} AS (
+                SELECT
+                    rel.user_id AS id,
+                    rel.user_id AS user_id,
+                    COUNT(*) AS open_count,
+                    COUNT(*) FILTER (
+                        WHERE task.date_deadline < NOW() AT TIME ZONE 'UTC'
+                    ) AS late_count,
+                    COALESCE(SUM(task.allocated_hours), 0) AS planned_hours,
+                    COALESCE(SUM(timesheet.hours), 0) AS spent_hours,
+                    COALESCE(SUM(task.distance), 0) AS distance,
+                    NOW() AT TIME ZONE 'UTC' AS refreshed_at
+                FROM project_task task
+                JOIN project_task_user_rel rel ON rel.task_id = task.id
+                JOIN project_project project ON project.id = task.project_id
+                LEFT JOIN project_task_type stage ON stage.id = task.stage_id
+                LEFT JOIN (
+                    SELECT task_id, SUM(unit_amount) AS hours
+                    FROM account_analytic_line
+                    WHERE task_id IS NOT NULL
+                    GROUP BY task_id
+                ) timesheet ON timesheet.task_id = task.id
+                WHERE project.is_fsm
+                  AND task.active
+                  AND stage.stage_sequence IS DISTINCT FROM 3
+                GROUP BY rel.user_id
+            );
+            CREATE UNIQUE INDEX {self._table}_user_id_index
+                ON {self._table} (user_id);
+        """)
+
+    @api.model
+    def _cron_refresh(self):
+        """Refresh the view without blocking its readers"""
+        self.env.cr.execute(
+            f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self._table}"
+        )
+        self.env.invalidate_all()
+
+    @api.model
+    def _schedule_refresh(self):
+        """
+        Refresh the view shortly after a relevant write, the delay
+        gathering the writes of a burst (e.g. a sync) in one refresh
+        """
+        self.env.ref(
+            'field_service_api.ir_cron_fsm_refresh_workload'
+        )._trigger(
+            fields.Datetime.now() + datetime.timedelta(seconds=30)
+        )